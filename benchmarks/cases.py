@@ -0,0 +1,202 @@
+"""Benchmark cases for the injection and registration hot paths.
+
+Each case prepares a fresh container and returns the callable to time, so cases do not depend on each other.
+"""
+from typing import Callable, Dict, List, Optional
+
+from sproing import dependency, inject
+from sproing.container import All, Container, initialize_container
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    def register(setup: Callable[[], Callable[[], object]]):
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+class Client:
+    pass
+
+
+class Settings:
+    pass
+
+
+class Plugin:
+    pass
+
+
+def client() -> Client:
+    return Client()
+
+
+def settings() -> Settings:
+    return Settings()
+
+
+def handler(client: Client, settings: Settings) -> None:
+    ...
+
+
+def register_handler_dependencies():
+    initialize_container()
+    dependency(client)
+    dependency(settings, singleton=True)
+
+
+@case("call/direct")
+def direct_call():
+    shared_settings = Settings()
+    return lambda: handler(client(), shared_settings)
+
+
+@case("call/inject")
+def injected_call():
+    register_handler_dependencies()
+    return inject()(handler)
+
+
+@case("call/inject-compiled")
+def compiled_call():
+    register_handler_dependencies()
+    return inject(compile=True)(handler)
+
+
+@case("call/inject-supplied")
+def supplied_call():
+    register_handler_dependencies()
+    injected = inject()(handler)
+    shared_client = Client()
+    return lambda: injected(shared_client)
+
+
+class Service:
+    __slots__ = ("client", "settings")
+
+    def __init__(self, client: Client, settings: Settings):
+        self.client = client
+        self.settings = settings
+
+
+@case("construct/direct")
+def direct_construction():
+    shared_settings = Settings()
+    return lambda: Service(client(), shared_settings)
+
+
+@case("construct/inject-class")
+def injected_construction():
+    register_handler_dependencies()
+    injected = inject()(type("InjectedService", (Service,), {"__slots__": ()}))
+    return injected
+
+
+@case("construct/provider-class")
+def class_provider():
+    register_handler_dependencies()
+    return dependency(Service)
+
+
+@case("resolve/factory")
+def factory_resolution():
+    initialize_container()
+    return dependency(client)
+
+
+@case("resolve/singleton")
+def singleton_resolution():
+    initialize_container()
+    return dependency(settings, singleton=True)
+
+
+def fan_out(size: int, singleton: bool = False):
+    initialize_container()
+    for index in range(size):
+        def plugin() -> Plugin:
+            return Plugin()
+
+        plugin.__name__ = f"plugin_{index}"
+        dependency(plugin, singleton=singleton)
+
+    @inject()
+    def plugins(plugins: All[Plugin]) -> None:
+        ...
+
+    return plugins
+
+
+for fan_out_size in (1, 10, 100):
+    case(f"all/fan-out-{fan_out_size}")(lambda size=fan_out_size: fan_out(size))
+case("all/fan-out-100-singletons")(lambda: fan_out(100, singleton=True))
+
+
+@case("inject/explicit-named")
+def explicit_named():
+    initialize_container()
+    dependency(client, name="primary_client")
+
+    @inject(explicit={"client": "primary_client"})
+    def named(client: Client) -> None:
+        ...
+
+    return named
+
+
+def lookup(sealed: bool):
+    container = Container()
+    dependency(client, container=container)
+    if sealed:
+        container.seal()
+    return lambda: container.get_dependency(Client)
+
+
+case("lookup/open")(lambda: lookup(False))
+case("lookup/sealed")(lambda: lookup(True))
+
+
+@case("lookup/miss")
+def lookup_miss():
+    container = Container()
+    dependency(client, container=container)
+    return lambda: container.find_dependency(Plugin)
+
+
+@case("call/inject-optional-miss")
+def optional_miss_call():
+    register_handler_dependencies()
+
+    @inject()
+    def optional(client: Client, plugin: Optional[Plugin] = None) -> None:
+        ...
+
+    return optional
+
+
+def make_providers(count: int) -> List[Callable[[], object]]:
+    """Builds providers of distinct types, like the ones of a plugin-heavy service."""
+    providers = []
+    for index in range(count):
+        provided = type(f"Provided{index}", (), {})
+
+        def provider() -> provided:
+            return provided()
+
+        provider.__name__ = f"provider_{index}"
+        providers.append(provider)
+    return providers
+
+
+@case("register/bulk-10k")
+def bulk_registration():
+    providers = make_providers(10_000)
+
+    def register():
+        initialize_container()
+        for provider in providers:
+            dependency(provider)
+
+    return register
@@ -0,0 +1,116 @@
+"""Runs the benchmark suite and optionally saves or compares the results against a baseline.
+
+Run from the repository root with: python -m benchmarks.run [--save [FILE]] [--compare [FILE]] [--memory]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from typing import Dict
+
+from benchmarks.cases import CASES, make_providers
+from sproing import dependency
+from sproing.container import initialize_container
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+
+def measure(stmt, repeat: int, min_time: float) -> float:
+    """Returns the best time per call in nanoseconds, calibrating the loop count to run at least min_time."""
+    timer = timeit.Timer(stmt)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def format_time(nanoseconds: float) -> str:
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if nanoseconds >= scale:
+            return f"{nanoseconds / scale:.2f} {unit}"
+    return f"{nanoseconds:.1f} ns"
+
+
+def measure_registration_memory(count: int) -> float:
+    """Returns the memory held per registered dependency in bytes, without the providers themselves."""
+    providers = make_providers(count)
+    initialize_container()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for provider in providers:
+        dependency(provider)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    initialize_container()
+    return (after - before) / count
+
+
+def run(pattern: str | None, repeat: int, min_time: float) -> Dict[str, float]:
+    results = {}
+    for name, setup in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        stmt = setup()
+        gc.collect()
+        results[name] = measure(stmt, repeat, min_time)
+        print(f"{name:<28}{format_time(results[name]):>14}", flush=True)
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> bool:
+    print(f"\n{'case':<28}{'baseline':>14}{'current':>14}{'change':>10}")
+    regressed = False
+    for name, current in results.items():
+        if name not in baseline:
+            print(f"{name:<28}{'-':>14}{format_time(current):>14}{'new':>10}")
+            continue
+        change = current / baseline[name] - 1
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressed = True
+        print(f"{name:<28}{format_time(baseline[name]):>14}{format_time(current):>14}{change:>+10.1%}{marker}")
+    return not regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=7, help="timing runs per case, the best one is kept")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of each timing run in seconds")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="save the results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="compare the results to a baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown reported as a regression when comparing")
+    parser.add_argument("--memory", action="store_true", help="also report the memory held per registered dependency")
+    args = parser.parse_args()
+    if args.compare and not os.path.exists(args.compare):
+        # Checked before running, as the cases take a while.
+        print(f"No baseline found at {args.compare}. Record one first with: "
+              f"python -m benchmarks.run --save {args.compare}",
+              file=sys.stderr)
+        return 2
+
+    results = run(args.pattern, args.repeat, args.min_time)
+    if args.memory:
+        print(f"{'register/memory-per-dependency':<28}{measure_registration_memory(10_000):>11.0f} B")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"python": platform.python_version(), "results": results}, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        return 0 if compare(results, baseline, args.threshold) else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
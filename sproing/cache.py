@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+from typing import Callable, Any, NamedTuple, Dict, Hashable, Set, Tuple
+
+from sproing.plan import submit_in_context
+
+
+class SproingCacheConfig(NamedTuple):
+    ttl: float
+    maxsize: int
+    max_stale: float
+
+
+class SproingCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    refreshes: int
+    size: int
+
+
+class SproingCacheDefinitionError(Exception):
+    def __init__(self, dependency_name: str, error: str):
+        super().__init__(f"Error defining dependency '{dependency_name}' cache: {error}")
+        self.dependency_name = dependency_name
+        self.error = error
+
+
+def cached(ttl: float, maxsize: int = 1, max_stale: float | None = None) -> SproingCacheConfig:
+    """Configures a dependency to reuse its value for ttl seconds instead of building one per injection.
+
+    Values are kept per distinct set of singleton provider arguments. Those only change when a singleton is built
+    again, like after a fork, so maxsize bounds the values kept for singletons that no longer exist, evicting the
+    least recently used. The other arguments are only built along with a new value.
+
+    Once a value expires it is still served while a single refresh runs in the background, for at most max_stale
+    seconds, ttl by default. Past that, or once a refresh failed, callers wait for a new value to be built.
+    """
+    return SproingCacheConfig(ttl, maxsize, ttl if max_stale is None else max_stale)
+
+
+def cache_key(value: Any) -> Hashable:
+    """Keys a cached value by a singleton argument it was built from: the argument itself, or its identity."""
+    try:
+        hash(value)
+    except TypeError:
+        # Singletons stay alive as long as their dependency, so their identity is stable.
+        return id(value)
+    return value
+
+
+class SproingCache:
+
+    def __init__(self, dependency_name: str, config: SproingCacheConfig):
+        if config.ttl <= 0:
+            raise SproingCacheDefinitionError(dependency_name, "ttl must be positive.")
+        if config.maxsize < 1:
+            raise SproingCacheDefinitionError(dependency_name, "maxsize must be at least 1.")
+        if config.max_stale < 0:
+            raise SproingCacheDefinitionError(dependency_name, "max_stale cannot be negative.")
+
+        self.dependency_name = dependency_name
+        self.config = config
+        # Values and the time they expire at, from the least to the most recently used.
+        self.entries: OrderedDict[Hashable, Tuple[Any, float]] = OrderedDict()
+        self.building: Dict[Hashable, Future] = {}
+        self.refreshing: Set[Hashable] = set()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def __store(self, key: Hashable, value: Any):
+        self.entries[key] = (value, time.monotonic() + self.config.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.config.maxsize:
+            self.entries.popitem(last=False)
+
+    def __refresh(self, key: Hashable, build: Callable[[], Any]):
+        try:
+            value = build()
+        except Exception:
+            # The stale value is dropped, so the next access builds a new one and reports the error.
+            with self.lock:
+                self.refreshing.discard(key)
+                self.entries.pop(key, None)
+            return
+        with self.lock:
+            self.refreshing.discard(key)
+            self.refreshes += 1
+            if key in self.entries:
+                self.__store(key, value)
+
+    def __build(self, key: Hashable, build: Callable[[], Any], future: Future) -> Any:
+        try:
+            value = build()
+        except BaseException as e:
+            with self.lock:
+                del self.building[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            del self.building[key]
+            self.__store(key, value)
+        future.set_result(value)
+        return value
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Returns the cached value for key, building it with build when missing.
+
+        Concurrent callers missing the same key wait for a single build. An expired value is returned as is, and
+        refreshed in the background unless a refresh is already running, until it is max_stale seconds past its
+        expiry: then it is built again like a missing one.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                now = time.monotonic()
+                if expires + self.config.max_stale < now:
+                    del self.entries[key]
+                else:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    if expires <= now and key not in self.refreshing:
+                        self.refreshing.add(key)
+                        # The refresh sees the caller's scope and trace, like a build on access would.
+                        submit_in_context(partial(self.__refresh, key, build))
+                    return value
+            self.misses += 1
+            future = self.building.get(key)
+            if future is None:
+                future = self.building[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if owner:
+            return self.__build(key, build, future)
+        return future.result()
+
+    def after_fork(self):
+        """Drops the builds and refreshes running in the parent's threads, which do not exist in the child process."""
+        self.lock = threading.Lock()
+        self.building = {}
+        self.refreshing = set()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> SproingCacheStats:
+        with self.lock:
+            return SproingCacheStats(self.hits, self.misses, self.refreshes, len(self.entries))
@@ -1,38 +1,55 @@
 from __future__ import annotations
 
+import time
+import types
 import typing
-from typing import Type, Callable, get_type_hints, List, Dict, TYPE_CHECKING, Iterable, TypeVar, Generic, Any, Sequence
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from abc import ABC
+from typing import (Type, Callable, get_type_hints, List, Dict, TYPE_CHECKING, Iterable, TypeVar, Generic, Any,
+                    Sequence, Tuple, Protocol, FrozenSet)
+
+from sproing.plan import SproingAll, EAGER, LAZY, PARALLEL
+from sproing.pool import SproingPooledDependencyError
+from sproing.scope import SproingScope, scope
 
 if TYPE_CHECKING:
     from sproing.dependency import SproingDependency
+    from sproing.plan import PLAN_TYPE
+    from sproing.scan import SproingScanIndex
 
 PRIMARIES_TYPE = Dict[type, "SproingDependency"]
 DEPENDENCIES_TYPE = Dict[Type, List["SproingDependency"]]
 NAMED_DEPENDENCIES_TYPE = Dict[str, "SproingDependency"]
+DEPENDENCY_GRAPH_TYPE = Dict["SproingDependency", Tuple["SproingDependency", ...]]
+PROTOCOLS_TYPE = Dict[type, List["SproingDependency"]]
+RESOLUTION_TABLE_TYPE = Dict[Any, "Tuple[SproingDependency, ...] | SproingDependency"]
 
-primaries: PRIMARIES_TYPE
-dependencies: DEPENDENCIES_TYPE
-named_dependencies: NAMED_DEPENDENCIES_TYPE
+T = TypeVar("T")
 
 
-def initialize_container():
-    global primaries, dependencies, named_dependencies
-    primaries = {}
-    dependencies = {}
-    named_dependencies = {}
+class All(Generic[T]):
+    pass
 
 
-initialize_container()
+class LazyAll(All[T]):
+    """Injects an iterator that builds the dependencies of T one by one while it is consumed."""
 
-T = TypeVar("T")
 
+class ParallelAll(All[T]):
+    """Injects the dependencies of T like All[T], building the factory ones in a thread pool."""
 
-class All(Generic[T]):
-    pass
+
+ALL_MODES = {All: EAGER, LazyAll: LAZY, ParallelAll: PARALLEL}
 
 
-def get_return_type(fn_: Callable):
-    return get_type_hints(fn_)['return']
+def get_hints(fn_: Callable) -> Dict[str, Any]:
+    """Returns the type hints of a provider. A class provides its own instances from the arguments of __init__."""
+    if not isinstance(fn_, type):
+        return get_type_hints(fn_)
+    hints = get_type_hints(fn_.__init__) if fn_.__init__ is not object.__init__ else {}
+    hints['return'] = fn_
+    return hints
 
 
 class SproingPrimaryDependencyError(Exception):
@@ -42,12 +59,6 @@ class SproingPrimaryDependencyError(Exception):
             f"a primary dependency for the type: {type_hint}.")
 
 
-def __register_primary_dependency(dependency: "SproingDependency"):
-    if dependency.return_type() in primaries:
-        raise SproingPrimaryDependencyError(dependency.name, str(dependency.return_type()))
-    primaries[dependency.return_type()] = dependency
-
-
 class SproingNamedDependencyError(Exception):
     def __init__(self, dependency_name: str, name: str):
         super().__init__(
@@ -60,75 +71,640 @@ class SproingDependencyError(Exception):
         super().__init__(error)
 
 
-def __register_named_dependency(dependency: "SproingDependency", name: str):
-    if name in named_dependencies:
-        raise SproingNamedDependencyError(dependency.name, name)
-    named_dependencies[name] = dependency
+class NoSuchSproingDependency(Exception):
+    def __init__(self, dependency_type: Type):
+        super().__init__(f"No dependency registered for type: {str(dependency_type)}")
+        self.dependency_type = dependency_type
 
 
-def register_dependency(dependency: SproingDependency,
-                        primary: bool,
-                        name: str | None = None) -> DEPENDENCIES_TYPE:
-    dependencies.setdefault(dependency.return_type(), []).append(dependency)
-
-    if primary and name:
-        raise SproingDependencyError(f"Error registering dependency '{dependency.name}'. "
-                                     "A dependency cannot be both primary and named.")
-    elif primary:
-        __register_primary_dependency(dependency)
-    elif name:
-        __register_named_dependency(dependency, name)
-    return dependencies
+class NoSuchNamedSproingDependency(Exception):
+    def __init__(self, name: str, dependency_type: Type):
+        super().__init__(f"No dependency registered for name and type: {name}, {str(dependency_type)}")
+        self.dependency_type = dependency_type
 
 
-class NoSuchSproingDependency(Exception):
-    def __init__(self, dependency_type: Type):
-        super().__init__(f"No dependency registered for type: {str(dependency_type)}")
+class SproingAmbiguousDependencyError(Exception):
+    def __init__(self, dependency_type: Type, candidates: Sequence["SproingDependency"]):
+        names = ", ".join(dependency.name for dependency in candidates)
+        super().__init__(f"Several dependencies provide a subtype of {str(dependency_type)}: {names}. "
+                         f"Set one of them as primary or register one for the type itself.")
         self.dependency_type = dependency_type
+        self.candidates = candidates
+
+
+class SproingCircularDependencyError(Exception):
+    def __init__(self, cycle: Sequence["SproingDependency"]):
+        path = " -> ".join(dependency.name for dependency in cycle)
+        super().__init__(f"Circular dependency detected: {path}")
+        self.cycle = cycle
+
+
+class SproingSealedContainerError(Exception):
+    def __init__(self, error: str):
+        super().__init__(error)
+
 
+class SproingWarmUpError(Exception):
+    def __init__(self, dependency_name: str, error: Exception):
+        super().__init__(f"Error warming up dependency '{dependency_name}': {error}")
+        self.dependency_name = dependency_name
+        self.error = error
 
-def __is_all(dependency_type: Any) -> bool:
-    return dependency_type.__name__ == 'All'
 
+def is_all(dependency_type: Any) -> bool:
+    return typing.get_origin(dependency_type) in ALL_MODES
 
-def __get_all_generic_type(type_hint: All) -> Type:
+
+def get_all_generic_type(type_hint: All) -> Type:
     return typing.get_args(type_hint)[0]
 
 
-def __get_all_dependencies(dependency_type: All) -> Sequence["SproingDependency"]:
-    generic_type = __get_all_generic_type(dependency_type)
-    try:
-        return dependencies[generic_type]
-    except KeyError as e:
-        raise NoSuchSproingDependency(generic_type) from e
+# Bases every class shares, which are never resolved by subtype.
+IGNORED_SUPERTYPES = frozenset((object, Generic, Protocol, ABC))
+
+
+def get_supertypes(return_type: Any) -> Tuple[type, ...]:
+    if not isinstance(return_type, type):
+        return ()
+    return tuple(base for base in return_type.__mro__[1:] if base not in IGNORED_SUPERTYPES)
 
 
-def __get_primary_dependency(dependency_type: Type) -> "SproingDependency":
-    return primaries[dependency_type]
+def get_optional_type(hint: Any) -> Any:
+    """Returns T for Optional[T] and T | None hints, or None for the other hints."""
+    if typing.get_origin(hint) not in (typing.Union, types.UnionType):
+        return None
+    arguments = typing.get_args(hint)
+    others = tuple(argument for argument in arguments if argument is not type(None))
+    if len(others) == len(arguments):
+        return None
+    return others[0] if len(others) == 1 else typing.Union[others]
 
 
-def __get_single_dependency(dependency_type: Type) -> Sequence[SproingDependency]:
+def is_runtime_protocol(dependency_type: Any) -> bool:
+    """Whether implementations of the type can be found structurally: only runtime checkable protocols can."""
+    return isinstance(dependency_type, type) and getattr(dependency_type, '_is_runtime_protocol', False)
+
+
+def implements_protocol(return_type: Any, protocol: type) -> bool:
+    """Checks a return type against a runtime checkable protocol it does not explicitly inherit from."""
+    if not isinstance(return_type, type):
+        return False
     try:
-        return dependencies[dependency_type][:1]
-    except KeyError as e:
-        raise NoSuchSproingDependency(dependency_type) from e
+        return issubclass(return_type, protocol)
+    except TypeError:
+        # Protocols with data members cannot be checked against classes.
+        return False
+
+
+class Container:
+    """Registry of dependencies.
+
+    Dependencies are also resolved by the bases of their return type, through an index of supertypes updated on
+    registration, and by the runtime checkable protocols their return type implements. A single dependency of a
+    supertype is resolved from, in order: the primary or first dependency of the exact type, the only dependency of a
+    subtype, or the only primary among those. Otherwise SproingAmbiguousDependencyError is raised.
+
+    A child container is an overlay on its parent: the child only keeps its own registrations, so the parent's tables
+    are never copied or changed and later registrations into the parent are still seen. A single lookup is answered
+    by the nearest container along the parent chain that provides the type, so the child shadows its parent, while
+    All[T] merges the dependencies of the whole chain, the parent's first.
+    """
+
+    def __init__(self, parent: Container | None = None):
+        self.parent = parent
+        self.primaries: PRIMARIES_TYPE = {}
+        self.dependencies: DEPENDENCIES_TYPE = {}
+        self.named_dependencies: NAMED_DEPENDENCIES_TYPE = {}
+        self.supertypes: DEPENDENCIES_TYPE = {}
+        self.protocols: PROTOCOLS_TYPE = {}
+        # Incremented whenever the container changes, so cached injection plans can tell they are stale.
+        self.changes = 0
+        self.graph_cache: Tuple[int | None, DEPENDENCY_GRAPH_TYPE] = (None, {})
+        self.table: RESOLUTION_TABLE_TYPE | None = None
+        self.deferred: List[Callable[[], None]] = []
+        # Indexes of scanned packages, whose modules are imported on the first lookup of a type they provide.
+        self.indexes: List["SproingScanIndex"] = []
+        # Types nothing provided, with the generation they were looked up at.
+        self.misses: Dict[Any, int] = {}
+        containers.add(self)
+
+    @property
+    def generation(self) -> int:
+        if self.parent is None:
+            return self.changes
+        return self.changes + self.parent.generation
+
+    def child(self) -> Container:
+        return Container(self)
+
+    @property
+    def sealed(self) -> bool:
+        return self.table is not None
+
+    def scope(self) -> SproingScope:
+        """Opens a scope for use in a with block. The active scope is shared by every container, like scope()."""
+        return SproingScope()
+
+    def defer(self, validation: Callable[[], None]):
+        """Schedules a validation that needs the complete registry, run when the container is sealed."""
+        self.deferred.append(validation)
+
+    def add_index(self, index: "SproingScanIndex"):
+        self.indexes.append(index)
+        # Types that missed before may be provided by the scanned modules.
+        self.invalidate()
+
+    def __load_scanned(self, load: Callable[["SproingScanIndex"], bool]) -> bool:
+        loaded = False
+        container = self
+        while container is not None:
+            for index in container.indexes:
+                loaded = load(index) or loaded
+            container = container.parent
+        return loaded
+
+    def seal(self):
+        """Validates the dependency graph and freezes the container.
+
+        Every requestable key (each type, All[T] and each name) is resolved once into a flat table, and lookups
+        become a single read of that table. Registering into a sealed container raises SproingSealedContainerError.
+        The parent of a child container must be sealed first, as changes to it would not reach the table.
+        """
+        if self.parent is not None and not self.parent.sealed:
+            raise SproingSealedContainerError("The parent container must be sealed before its children.")
+        # Nothing can be registered once sealed, so the modules of scanned packages are imported now.
+        self.__load_scanned(lambda index: index.load_all())
+        for dependency in self.get_resolution_order():
+            dependency.container.resolve_parameters(dependency.parameters, dependency.metadata.defaults)
+        for validation in self.deferred:
+            validation()
+
+        table = {}
+        container = self
+        while container is not None:
+            for dependency_type in (*container.dependencies, *container.supertypes):
+                if dependency_type not in table:
+                    table[All[dependency_type]] = tuple(self.get_dependency(All[dependency_type]))
+                    try:
+                        table[dependency_type] = tuple(self.get_dependency(dependency_type))
+                    except SproingAmbiguousDependencyError:
+                        # Left out, so the lookup raises.
+                        continue
+            for name in container.named_dependencies:
+                table.setdefault(name, self.get_named_dependency(name))
+            container = container.parent
+
+        # Misses fall back to the regular lookups, which raise the usual errors.
+        find_dependency = self.find_dependency
+        get_dependency = self.get_dependency
+        get_named_dependency = self.get_named_dependency
+
+        def find_sealed_dependency(dependency_type: Type) -> Tuple["SproingDependency", ...]:
+            try:
+                return table[dependency_type]
+            except KeyError:
+                return find_dependency(dependency_type)
+
+        def get_sealed_dependency(dependency_type: Type) -> Tuple["SproingDependency", ...]:
+            try:
+                return table[dependency_type]
+            except KeyError:
+                return get_dependency(dependency_type)
+
+        def get_sealed_named_dependency(dependency_name: str) -> "SproingDependency":
+            try:
+                return table[dependency_name]
+            except KeyError:
+                return get_named_dependency(dependency_name)
+
+        self.table = table
+        self.find_dependency = find_sealed_dependency
+        self.get_dependency = get_sealed_dependency
+        self.get_named_dependency = get_sealed_named_dependency
+        self.invalidate()
+
+    def reset(self):
+        if self.sealed:
+            del self.find_dependency
+            del self.get_dependency
+            del self.get_named_dependency
+            self.table = None
+        self.primaries = {}
+        self.dependencies = {}
+        self.named_dependencies = {}
+        self.supertypes = {}
+        self.protocols = {}
+        self.deferred = []
+        self.indexes = []
+        self.misses = {}
+        self.invalidate()
+
+    def invalidate(self):
+        """Marks cached injection plans as stale without changing the registered dependencies."""
+        self.changes += 1
+
+    def registered(self) -> Iterable["SproingDependency"]:
+        """Every dependency visible through this container, each one once."""
+        seen = set()
+        container = self
+        while container is not None:
+            for registered in container.dependencies.values():
+                for dependency in registered:
+                    if dependency not in seen:
+                        seen.add(dependency)
+                        yield dependency
+            container = container.parent
+
+    def install_strategies(self):
+        """Re-installs the strategies of the dependencies registered here after instrumentation is turned on or off."""
+        installed = set()
+        for registered in self.dependencies.values():
+            for dependency in registered:
+                if dependency not in installed:
+                    installed.add(dependency)
+                    dependency.install_strategies()
+        self.invalidate()
+
+    def __find(self, table: str, key: Any) -> Any:
+        """Returns the entry of key in the nearest table along the parent chain, or None."""
+        container = self
+        while container is not None:
+            entries = getattr(container, table)
+            if key in entries:
+                return entries[key]
+            container = container.parent
+        return None
+
+    def __collect(self, table: str, key: Any) -> List["SproingDependency"]:
+        """Returns the dependencies of key along the parent chain, the ones of the root container first."""
+        entries = getattr(self, table).get(key, [])
+        if self.parent is None:
+            return entries
+        inherited = self.parent.__collect(table, key)
+        if not inherited:
+            return entries
+        return [*inherited, *entries] if entries else inherited
+
+    def __register_primary_dependency(self, dependency: "SproingDependency"):
+        if dependency.return_type() in self.primaries:
+            raise SproingPrimaryDependencyError(dependency.name, str(dependency.return_type()))
+        self.primaries[dependency.return_type()] = dependency
+
+    def __register_named_dependency(self, dependency: "SproingDependency", name: str):
+        if name in self.named_dependencies:
+            raise SproingNamedDependencyError(dependency.name, name)
+        self.named_dependencies[name] = dependency
+
+    def register_dependency(self, dependency: SproingDependency,
+                            primary: bool,
+                            name: str | None = None) -> DEPENDENCIES_TYPE:
+        if self.sealed:
+            raise SproingSealedContainerError(f"Error registering dependency '{dependency.name}'. "
+                                              "The container is sealed.")
+        self.invalidate()
+        return_type = dependency.return_type()
+        self.dependencies.setdefault(return_type, []).append(dependency)
+        for supertype in get_supertypes(return_type):
+            self.supertypes.setdefault(supertype, []).append(dependency)
+        for protocol, implementations in self.protocols.items():
+            if self.__implements(dependency, protocol):
+                implementations.append(dependency)
+
+        if primary and name:
+            raise SproingDependencyError(f"Error registering dependency '{dependency.name}'. "
+                                         "A dependency cannot be both primary and named.")
+        elif primary:
+            self.__register_primary_dependency(dependency)
+        elif name:
+            self.__register_named_dependency(dependency, name)
+        return self.dependencies
+
+    @staticmethod
+    def __implements(dependency: "SproingDependency", protocol: type) -> bool:
+        # Providers declared as returning the protocol itself are exact matches, not structural ones.
+        return dependency.return_type() is not protocol and implements_protocol(dependency.return_type(), protocol)
+
+    def __get_protocol_dependencies(self, protocol: type) -> List["SproingDependency"]:
+        """Returns the dependencies registered in this container whose return type implements the protocol.
+
+        The registrations are only checked on the first lookup of a protocol. Dependencies registered afterwards are
+        checked against the protocols looked up so far when they are registered.
+        """
+        implementations = self.protocols.get(protocol)
+        if implementations is None:
+            implementations = [dependency for registered in self.dependencies.values() for dependency in registered
+                               if self.__implements(dependency, protocol)]
+            self.protocols[protocol] = implementations
+        return implementations
+
+    def __get_subtype_dependencies(self, dependency_type: Type) -> List["SproingDependency"]:
+        """Returns the dependencies registered in this container that provide a subtype of the type."""
+        subtypes = self.supertypes.get(dependency_type, [])
+        if is_runtime_protocol(dependency_type):
+            subtypes = subtypes + [dependency for dependency in self.__get_protocol_dependencies(dependency_type)
+                                   if dependency not in subtypes]
+        return subtypes
+
+    def __collect_subtype_dependencies(self, dependency_type: Type) -> List["SproingDependency"]:
+        """Returns the dependencies of a subtype along the parent chain, the ones of the root container first."""
+        subtypes = self.__get_subtype_dependencies(dependency_type)
+        if self.parent is None:
+            return subtypes
+        return [*self.parent.__collect_subtype_dependencies(dependency_type), *subtypes]
+
+    def __is_primary(self, dependency: "SproingDependency") -> bool:
+        return self.__find('primaries', dependency.return_type()) is dependency
+
+    def __get_all_dependencies(self, dependency_type: All) -> Tuple["SproingDependency", ...]:
+        generic_type = get_all_generic_type(dependency_type)
+        exact = self.__collect('dependencies', generic_type)
+        return (*exact, *self.__collect_subtype_dependencies(generic_type))
+
+    def __get_single_dependency(self, dependency_type: Type) -> Tuple["SproingDependency", ...]:
+        # The nearest container registering the type itself shadows its parents, and so does the nearest one
+        # registering a subtype when none registers the type.
+        container = self
+        while container is not None:
+            if exact := container.dependencies.get(dependency_type):
+                return (container.primaries.get(dependency_type, exact[0]),)
+            container = container.parent
+        container = self
+        while container is not None:
+            if candidates := container.__get_subtype_dependencies(dependency_type):
+                break
+            container = container.parent
+        else:
+            return ()
+        if len(candidates) == 1:
+            return tuple(candidates)
+        primaries = [candidate for candidate in candidates if self.__is_primary(candidate)]
+        if len(primaries) == 1:
+            return tuple(primaries)
+        raise SproingAmbiguousDependencyError(dependency_type, candidates)
+
+    def __lookup(self, dependency_type: Type) -> Tuple["SproingDependency", ...]:
+        """Returns the dependencies provided for a type, or an empty tuple."""
+        if is_all(dependency_type):
+            return self.__get_all_dependencies(dependency_type)
+        return self.__get_single_dependency(dependency_type)
+
+    def find_dependency(self, dependency_type: Type) -> Tuple["SproingDependency", ...]:
+        """Like get_dependency, but returns an empty tuple instead of raising when nothing provides the type.
+
+        Misses are remembered until the container changes, so looking up a missing type again is one dictionary
+        read, like a hit on a sealed container.
+        """
+        generation = self.generation
+        if self.misses.get(dependency_type) == generation:
+            return ()
+        # Scanned modules providing the type are imported first, so the result does not depend on which modules
+        # happen to be imported already: one of them may provide the primary, the exact type or another member.
+        generic_type = get_all_generic_type(dependency_type) if is_all(dependency_type) else dependency_type
+        type_name = getattr(generic_type, '__name__', None)
+        if self.__load_scanned(lambda index: index.load_type(type_name)):
+            generation = self.generation
+        resolved = self.__lookup(dependency_type)
+        if not resolved:
+            self.misses[dependency_type] = generation
+        return resolved
+
+    def get_dependency(self, dependency_type: Type) -> Tuple["SproingDependency", ...]:
+        if resolved := self.find_dependency(dependency_type):
+            return resolved
+        if is_all(dependency_type):
+            raise NoSuchSproingDependency(get_all_generic_type(dependency_type))
+        raise NoSuchSproingDependency(dependency_type)
+
+    def get_named_dependency(self, dependency_name: str) -> "SproingDependency":
+        dependency = self.__find('named_dependencies', dependency_name)
+        if dependency is None and self.__load_scanned(lambda index: index.load_name(dependency_name)):
+            dependency = self.__find('named_dependencies', dependency_name)
+        if dependency is None:
+            raise NoSuchNamedSproingDependency(dependency_name, type)
+        return dependency
+
+    def resolve_parameters(self, parameters: Dict[str, Type], defaults: FrozenSet[str] = frozenset()
+                           ) -> Tuple[PLAN_TYPE, Tuple[str, ...]]:
+        """Returns the plan of the parameters the container provides, and the names of those to pass None.
+
+        Optional parameters are not resolved when nothing provides them: those with a default keep it, and the
+        Optional[T] ones are passed None. Any other parameter nothing provides raises NoSuchSproingDependency.
+        """
+        plan = []
+        nones = []
+        for argname, hint in parameters.items():
+            optional_type = get_optional_type(hint)
+            if optional_type is not None or argname in defaults:
+                hint = hint if optional_type is None else optional_type
+                if not self.find_dependency(hint):
+                    if argname not in defaults:
+                        nones.append(argname)
+                    continue
+            resolved = self.get_dependency(hint)
+            if is_all(hint):
+                for dependency in resolved:
+                    if dependency.pool is not None:
+                        raise SproingPooledDependencyError(dependency.name, "cannot be resolved through All[T].")
+                plan.append((argname, SproingAll(resolved, ALL_MODES[typing.get_origin(hint)])))
+            else:
+                plan.append((argname, resolved[0]))
+        return tuple(plan), tuple(nones)
+
+    @staticmethod
+    def __get_edges(dependency: "SproingDependency") -> Tuple["SproingDependency", ...]:
+        edges = []
+        for hint in dependency.parameters.values():
+            optional_type = get_optional_type(hint)
+            try:
+                edges.extend(dependency.container.find_dependency(hint if optional_type is None else optional_type))
+            except SproingAmbiguousDependencyError:
+                # Reported by the dependency itself when it is resolved.
+                continue
+        return tuple(edges)
+
+    def get_dependency_graph(self) -> DEPENDENCY_GRAPH_TYPE:
+        """Maps every registered dependency to the dependencies its provider parameters resolve to."""
+        graph_generation, graph = self.graph_cache
+        if graph_generation != self.generation:
+            graph_generation = self.generation
+            graph = {dependency: self.__get_edges(dependency) for dependency in self.registered()}
+            self.graph_cache = (graph_generation, graph)
+        return graph
+
+    def get_resolution_order(self, roots: Iterable["SproingDependency"] | None = None
+                             ) -> Tuple["SproingDependency", ...]:
+        """Topologically sorts the dependency graph, so every dependency comes after the ones it is built from.
+
+        Only the dependencies reachable from the given roots are sorted, or the whole graph when no roots are given.
+        Raises SproingCircularDependencyError when a cycle is found.
+        """
+        graph_generation, graph = self.graph_cache
+        if roots is None:
+            graph = self.get_dependency_graph()
+        elif graph_generation != self.generation:
+            # The edges of the reachable dependencies are read as they are visited, instead of rebuilding the graph of
+            # every registered dependency after each registration.
+            graph = {}
+        order = []
+        visited = set()
+        path = []
+        on_path = set()
+
+        def visit(dependency: "SproingDependency"):
+            if dependency in on_path:
+                raise SproingCircularDependencyError(path[path.index(dependency):] + [dependency])
+            if dependency in visited:
+                return
+            path.append(dependency)
+            on_path.add(dependency)
+            edges = graph[dependency] if dependency in graph else self.__get_edges(dependency)
+            for edge in edges:
+                visit(edge)
+            on_path.remove(dependency)
+            path.pop()
+            visited.add(dependency)
+            order.append(dependency)
+
+        for root in (graph if roots is None else roots):
+            visit(root)
+        return tuple(order)
+
+    @staticmethod
+    def __get_requirements(dependency: "SproingDependency", graph: DEPENDENCY_GRAPH_TYPE,
+                           selected: Callable[["SproingDependency"], bool]) -> List["SproingDependency"]:
+        requirements = []
+        visited = set()
+        stack = list(graph.get(dependency, ()))
+        while stack:
+            edge = stack.pop()
+            if edge in visited:
+                continue
+            visited.add(edge)
+            if selected(edge):
+                requirements.append(edge)
+            else:
+                stack.extend(graph.get(edge, ()))
+        return requirements
+
+    @staticmethod
+    def __timed_build(dependency: "SproingDependency") -> float:
+        start = time.perf_counter()
+        dependency()
+        return time.perf_counter() - start
+
+    @staticmethod
+    def __timed_fill(dependency: "SproingDependency") -> float:
+        start = time.perf_counter()
+        dependency.pool.fill()
+        return time.perf_counter() - start
+
+    def warm_up(self, max_workers: int | None = None,
+                select: Callable[["SproingDependency"], bool] | None = None) -> Dict["SproingDependency", float]:
+        """Builds every eager singleton (lazy=False) in a thread pool and returns the build time of each, by dependency.
+
+        A singleton is only submitted once the eager singletons it depends on are built, so independent ones are
+        built at the same time. Pools of synchronous pooled dependencies are filled up to their min_idle size
+        alongside. The first failure cancels the pending builds and raises SproingWarmUpError.
+
+        select picks the singletons to build instead of the eager ones, and then pools are left empty.
+        """
+        selected = (lambda dependency: dependency.eager) if select is None else select
+        graph = self.get_dependency_graph()
+        pending = [dependency for dependency in self.get_resolution_order()
+                   if selected(dependency) and not dependency.initialized]
+        dependents = {dependency: [] for dependency in pending}
+        remaining = {}
+        for dependency in pending:
+            requirements = [requirement for requirement in self.__get_requirements(dependency, graph, selected)
+                            if requirement in dependents]
+            for requirement in requirements:
+                dependents[requirement].append(dependency)
+            remaining[dependency] = len(requirements)
+
+        timings = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {executor.submit(self.__timed_build, dependency): dependency
+                       for dependency in pending if not remaining[dependency]}
+            running.update({executor.submit(self.__timed_fill, dependency): dependency for dependency in graph
+                            if select is None and dependency.pool is not None and dependency.pool.config.min_idle
+                            and not dependency.is_async})
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dependency = running.pop(future)
+                    try:
+                        timings[dependency] = future.result()
+                    except Exception as e:
+                        for other in running:
+                            other.cancel()
+                        raise SproingWarmUpError(dependency.name, e) from e
+                    for dependent in dependents.get(dependency, ()):
+                        remaining[dependent] -= 1
+                        if not remaining[dependent]:
+                            running[executor.submit(self.__timed_build, dependent)] = dependent
+        return timings
+
+
+containers: weakref.WeakSet[Container] = weakref.WeakSet()
+
+default_container = Container()
+
+
+def __getattr__(name: str) -> Any:
+    # The registry tables of the module-level API are the ones of the default container.
+    if name in ("primaries", "dependencies", "named_dependencies", "generation"):
+        return getattr(default_container, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def get_dependency(dependency_type: Type) -> Sequence[SproingDependency]:
-    if __is_all(dependency_type):
-        return __get_all_dependencies(dependency_type)
-    elif dependency_type in primaries:
-        return [primaries[dependency_type]]
-    return __get_single_dependency(dependency_type)
+def initialize_container():
+    default_container.reset()
 
 
-class NoSuchNamedSproingDependency(Exception):
-    def __init__(self, name: str, dependency_type: Type):
-        super().__init__(f"No dependency registered for name and type: {name}, {str(dependency_type)}")
-        self.dependency_type = dependency_type
+def seal():
+    default_container.seal()
+
+
+def invalidate():
+    default_container.invalidate()
+
+
+def install_strategies():
+    """Re-installs the strategies of the dependencies of every container after instrumentation is turned on or off."""
+    for container in list(containers):
+        container.install_strategies()
+
+
+def register_dependency(dependency: SproingDependency,
+                        primary: bool,
+                        name: str | None = None) -> DEPENDENCIES_TYPE:
+    return default_container.register_dependency(dependency, primary, name)
+
+
+def get_dependency(dependency_type: Type) -> Tuple["SproingDependency", ...]:
+    return default_container.get_dependency(dependency_type)
+
+
+def find_dependency(dependency_type: Type) -> Tuple["SproingDependency", ...]:
+    return default_container.find_dependency(dependency_type)
 
 
 def get_named_dependency(dependency_name: str) -> "SproingDependency":
-    if dependency_name not in named_dependencies:
-        raise NoSuchNamedSproingDependency(dependency_name, type)
-    return named_dependencies[dependency_name]
+    return default_container.get_named_dependency(dependency_name)
+
+
+def resolve_parameters(parameters: Dict[str, Type], defaults: FrozenSet[str] = frozenset()
+                       ) -> Tuple[PLAN_TYPE, Tuple[str, ...]]:
+    return default_container.resolve_parameters(parameters, defaults)
+
+
+def get_dependency_graph() -> DEPENDENCY_GRAPH_TYPE:
+    return default_container.get_dependency_graph()
+
+
+def get_resolution_order(roots: Iterable["SproingDependency"] | None = None) -> Tuple["SproingDependency", ...]:
+    return default_container.get_resolution_order(roots)
+
+
+def warm_up(max_workers: int | None = None) -> Dict["SproingDependency", float]:
+    return default_container.warm_up(max_workers)
@@ -1,42 +1,276 @@
 from __future__ import annotations
 
-from inspect import signature
-from typing import get_type_hints, Callable, List, Dict, Type, Iterable, Any
+import asyncio
+import threading
+from functools import partial
+from inspect import signature, iscoroutinefunction, Parameter
+from typing import Callable, List, Dict, Type, Iterable, Any, Tuple, FrozenSet
 
-from sproing.container import register_dependency, get_return_type
+from sproing import manifest
+from sproing import metrics
+from sproing import tracing
+from sproing.container import Container, default_container, get_hints
+from sproing.manifest import METADATA_TYPE
+from sproing.plan import (RESOLVERS_TYPE, validate_async_dependencies, split_async_resolvers, resolve_async_arguments,
+                          resolve_none)
+from sproing.cache import SproingCache, SproingCacheConfig, SproingCacheDefinitionError, cache_key
+from sproing.fork import FORK_POLICIES, SHARE, REINIT, FORBID, SproingForkDefinitionError, SproingForkError
+from sproing.pool import SproingPool, SproingPoolConfig, SproingPoolDefinitionError, SproingPooledDependencyError
+from sproing.scope import SCOPES, SproingScopeError, current_scope
+
+# Marks a singleton that was not built yet, so falsy values are not mistaken for missing ones.
+UNINITIALIZED = object()
+# Replaces the value of a singleton built before forking that the child process must not use.
+FORBIDDEN = object()
+
+
+class SproingProviderMetadata:
+    """What a provider declares, read once from its signature and type hints."""
+
+    __slots__ = ("name", "parameters", "unhinted", "defaults", "return_type", "is_async")
+
+    def __init__(self, name: str, parameters: Dict[str, Type], unhinted: Tuple[str, ...], defaults: FrozenSet[str],
+                 return_type: Type | None, is_async: bool):
+        self.name = name
+        self.parameters = parameters
+        self.unhinted = unhinted
+        self.defaults = defaults
+        self.return_type = return_type
+        self.is_async = is_async
+
+
+def __introspect(provider: Callable) -> METADATA_TYPE:
+    hints = get_hints(provider)
+    parameters = signature(provider).parameters
+    types = {parameter: hints[parameter] for parameter in parameters if parameter in hints}
+    if 'return' in hints:
+        types['return'] = hints['return']
+    defaults = [parameter for parameter, declared in parameters.items() if declared.default is not Parameter.empty]
+    # Parameters with a default can go without a hint, as the provider is then passed nothing for them.
+    return types, {"unhinted": [parameter for parameter in parameters if parameter not in hints
+                                and parameter not in defaults],
+                   "defaults": defaults}
+
+
+def read_metadata(provider: Callable) -> SproingProviderMetadata:
+    read = partial(__introspect, provider)
+    if manifest.current_manifest is None:
+        types, fields = read()
+    else:
+        types, fields = manifest.current_manifest.get("providers", provider, read)
+    return_type = types.pop('return', None)
+    return SproingProviderMetadata(provider.__name__, types, tuple(fields["unhinted"]), frozenset(fields["defaults"]),
+                                   return_type, iscoroutinefunction(provider))
 
 
 class SproingDependency:
+    __slots__ = ("provider", "container", "metadata", "name", "singleton", "scope", "is_async", "parameters",
+                 "resolvers", "value", "lock", "async_lock", "pool", "cache", "fork", "eager", "build", "strategy")
 
-    def __init__(self, provider: Callable, *, singleton: bool = False, lazy: bool | None = None):
+    # Only singletons are built under a lock, and the slots are left empty for the other dependencies.
+    lock: threading.Lock
+    async_lock: asyncio.Lock
+
+    def __init__(self, provider: Callable, *,
+                 singleton: bool = False,
+                 lazy: bool | None = None,
+                 scope: str | None = None,
+                 pool: SproingPoolConfig | None = None,
+                 cache: SproingCacheConfig | None = None,
+                 fork: str | None = None,
+                 container: Container | None = None,
+                 metadata: SproingProviderMetadata | None = None):
         self.provider = provider
-        self.name = provider.__name__
+        self.container = default_container if container is None else container
+        self.metadata = read_metadata(provider) if metadata is None else metadata
+        self.name = self.metadata.name
+        self.singleton = singleton
+        self.scope = scope
+        self.is_async = self.metadata.is_async
+        self.parameters = self.metadata.parameters
+        self.resolvers: Tuple[int | None, RESOLVERS_TYPE, RESOLVERS_TYPE] = (None, (), ())
 
         if not singleton and lazy is not None and not lazy:
             raise SproingLazyDependencyDefinitionError(self.name, "must be lazy when not singleton.")
+        if self.is_async and lazy is not None and not lazy:
+            raise SproingLazyDependencyDefinitionError(self.name, "must be lazy when asynchronous.")
+        if scope is not None and scope not in SCOPES:
+            raise SproingScopeDefinitionError(self.name, f"unknown scope '{scope}'.")
+        if scope is not None and singleton:
+            raise SproingScopeDefinitionError(self.name, "a singleton cannot be scoped.")
+        if pool is not None and (singleton or scope is not None):
+            raise SproingPoolDefinitionError(self.name, "only factory dependencies can be pooled.")
+        if cache is not None and (singleton or scope is not None or pool is not None or self.is_async):
+            raise SproingCacheDefinitionError(self.name, "only synchronous factory dependencies can be cached.")
+        if fork is not None and fork not in FORK_POLICIES:
+            raise SproingForkDefinitionError(self.name, f"unknown fork policy '{fork}'.")
+        if fork is not None and not singleton:
+            raise SproingForkDefinitionError(self.name, "only singletons have a fork policy.")
+        if fork == SHARE and self.is_async:
+            raise SproingForkDefinitionError(self.name, "an asynchronous singleton cannot be shared with children.")
 
-        self.value = None
-        self.strategy = self.__factory_strategy
+        self.value = UNINITIALIZED
         if singleton:
-            self.strategy = self.__singleton_strategy
-            if lazy is not None and not lazy:
-                self.__initialize_singleton()
+            self.lock = threading.Lock()
+        if singleton and self.is_async:
+            self.async_lock = asyncio.Lock()
+        self.pool = SproingPool(self.name, self.provider, pool) if pool is not None else None
+        self.cache = SproingCache(self.name, cache) if cache is not None else None
+        self.fork = fork
+        self.install_strategies()
+
+        # Eager singletons are built by container.warm_up(), or on first use when it is not called.
+        self.eager = singleton and lazy is not None and not lazy
 
     def __call__(self):
         return self.strategy()
 
+    def install_strategies(self):
+        """Picks how the dependency is built and resolved, instrumenting them while metrics or tracing are enabled."""
+        build = self.provider
+        if self.parameters:
+            build = self.__build_async if self.is_async else self.__build
+        build = self.__instrument_build(build)
+        self.build = build
+
+        strategy = build
+        if self.cache is not None:
+            strategy = partial(self.__cached_strategy, self.cache)
+        elif self.pool is not None:
+            self.pool.build = build
+            strategy = self.pool.acquire_async if self.is_async else self.pool.acquire
+        elif self.value is FORBIDDEN:
+            strategy = self.__forbidden_strategy
+        elif self.singleton and self.is_async:
+            strategy = self.__async_singleton_strategy
+        elif self.singleton:
+            strategy = self.__singleton_strategy
+        elif self.scope is not None:
+            strategy = self.__async_scoped_strategy if self.is_async else self.__scoped_strategy
+        if metrics.current_sink is not None:
+            strategy = metrics.instrument_strategy(self.name, strategy, metrics.current_sink)
+        self.strategy = strategy
+
+    def after_fork(self):
+        """Called in the child process after a fork, where the threads that could hold the locks no longer exist."""
+        if self.singleton:
+            self.lock = threading.Lock()
+        if self.singleton and self.is_async:
+            self.async_lock = asyncio.Lock()
+        if self.pool is not None:
+            self.pool.after_fork()
+        if self.cache is not None:
+            self.cache.after_fork()
+        if self.value is UNINITIALIZED or self.value is FORBIDDEN:
+            return
+        if self.fork == REINIT:
+            self.value = UNINITIALIZED
+        elif self.fork == FORBID:
+            self.value = FORBIDDEN
+            self.install_strategies()
+
+    def __forbidden_strategy(self):
+        raise SproingForkError(self.name)
+
+    def __instrument_build(self, build: Callable[[], Any]) -> Callable[[], Any]:
+        if tracing.current_trace is not None:
+            build = tracing.trace_build(self.name, build, self.is_async, tracing.current_trace)
+        if metrics.current_sink is not None:
+            build = metrics.instrument_build(self.name, build, self.is_async, metrics.current_sink)
+        return build
+
+    def __cached_strategy(self, cache: SproingCache) -> Any:
+        sync_resolvers, _ = self.__get_resolvers()
+        # Values are cached per distinct set of singleton arguments, as other arguments are built anew for every call.
+        # The arguments themselves are only resolved when a value is built.
+        key = tuple(cache_key(resolve()) for _, resolve in sync_resolvers
+                    if isinstance(resolve, SproingDependency) and resolve.singleton)
+        return cache.get(key, self.build)
+
+    def release(self, instance: Any):
+        """Returns an instance of a pooled dependency to its pool."""
+        if self.pool is None:
+            raise SproingPooledDependencyError(self.name, "is not pooled.")
+        self.pool.release(instance)
+
+    @property
+    def initialized(self) -> bool:
+        return self.value is not UNINITIALIZED
+
     def __singleton_strategy(self):
-        return self.value or self.__initialize_singleton()
+        value = self.value
+        if value is UNINITIALIZED:
+            return self.__initialize_singleton()
+        return value
 
     def __initialize_singleton(self) -> Any:
-        self.value = self.provider()
-        return self.value
+        with self.lock:
+            if self.value is UNINITIALIZED:
+                self.value = self.build()
+            return self.value
+
+    async def __async_singleton_strategy(self) -> Any:
+        value = self.value
+        if value is UNINITIALIZED:
+            return await self.__initialize_async_singleton()
+        return value
+
+    async def __initialize_async_singleton(self) -> Any:
+        async with self.async_lock:
+            if self.value is UNINITIALIZED:
+                self.value = await self.build()
+            return self.value
+
+    def __get_scope_instances(self) -> Dict[SproingDependency, Any]:
+        instances = current_scope.get()
+        if instances is None:
+            raise SproingScopeError(self.name, self.scope)
+        return instances
+
+    def __scoped_strategy(self) -> Any:
+        instances = self.__get_scope_instances()
+        if self in instances:
+            return instances[self]
+        return instances.setdefault(self, self.build())
+
+    async def __async_scoped_strategy(self) -> Any:
+        instances = self.__get_scope_instances()
+        if self in instances:
+            return instances[self]
+        value = await self.build()
+        return instances.setdefault(self, value)
+
+    def __get_resolvers(self) -> Tuple[RESOLVERS_TYPE, RESOLVERS_TYPE]:
+        resolvers_generation, sync_resolvers, async_resolvers = self.resolvers
+        if resolvers_generation != self.container.generation:
+            resolvers_generation = self.container.generation
+            plan, nones = self.container.resolve_parameters(self.parameters, self.metadata.defaults)
+            requirements = self.container.get_resolution_order([self])
+            if self.singleton or self.pool is not None or self.cache is not None:
+                # Its instances outlive a scope, and would keep the scoped instances they were built with.
+                for requirement in requirements:
+                    if requirement.scope is not None:
+                        raise SproingScopeDefinitionError(self.name, f"it outlives the {requirement.scope} scope "
+                                                                     f"of '{requirement.name}', which it depends on.")
+            for _, resolved in plan:
+                if not isinstance(resolved, tuple) and resolved.pool is not None:
+                    raise SproingPooledDependencyError(resolved.name, "cannot be injected into another provider.")
+            if not self.is_async and (errors := validate_async_dependencies(self.name, plan)):
+                raise SproingDependencyDefinitionError(self.name, errors)
+            sync_resolvers, async_resolvers = split_async_resolvers(plan, metrics.current_sink is None)
+            sync_resolvers += tuple((argname, resolve_none) for argname in nones)
+            self.resolvers = (resolvers_generation, sync_resolvers, async_resolvers)
+        return sync_resolvers, async_resolvers
+
+    def __build(self) -> Any:
+        sync_resolvers, _ = self.__get_resolvers()
+        return self.provider(**{argname: resolve() for argname, resolve in sync_resolvers})
 
-    def __factory_strategy(self) -> Any:
-        return self.provider()
+    async def __build_async(self) -> Any:
+        return await self.provider(**await resolve_async_arguments(*self.__get_resolvers()))
 
     def return_type(self) -> Type[Any]:
-        return get_return_type(self.provider)
+        return self.metadata.return_type
 
 
 class SproingArgValidationError(Exception):
@@ -74,30 +308,28 @@ class SproingLazyDependencyDefinitionError(Exception):
         self.error = error
 
 
-def __validate_parameters(dependency_name: str,
-                          hints: Dict[str, Type],
-                          parameters: Iterable[str]) -> List[SproingArgValidationError]:
-    errors = []
-    for parameter in parameters:
-        if parameter not in hints:
-            error = SproingArgValidationError(parameter, dependency_name, "No type hint provided.")
-            errors.append(error)
-    return errors
+class SproingScopeDefinitionError(Exception):
+    def __init__(self, dependency_name: str, error: str):
+        super().__init__(f"Error defining dependency '{dependency_name}' scope: {error}")
+        self.dependency_name = dependency_name
+        self.error = error
+
 
+def __validate_parameters(dependency_name: str, unhinted: Iterable[str]) -> List[SproingArgValidationError]:
+    return [SproingArgValidationError(parameter, dependency_name, "No type hint provided.") for parameter in unhinted]
 
-def __validate_return_type(dependency_name: str, hints: Dict[str, Type]) -> SproingReturnValidationError:
-    if 'return' not in hints:
+
+def __validate_return_type(dependency_name: str, return_type: Type | None) -> SproingReturnValidationError:
+    if return_type is None:
         error = SproingReturnValidationError(dependency_name, "No return type hint provided.")
         return error
 
 
-def __validate_dependency(fn: Callable) -> List[SproingArgValidationError | SproingReturnValidationError]:
-    hints = get_type_hints(fn)
-    parameters = signature(fn).parameters
-
+def __validate_dependency(metadata: SproingProviderMetadata
+                          ) -> List[SproingArgValidationError | SproingReturnValidationError]:
     errors = []
-    errors.extend(__validate_parameters(fn.__name__, hints, parameters.keys()))
-    if error := __validate_return_type(fn.__name__, hints):
+    errors.extend(__validate_parameters(metadata.name, metadata.unhinted))
+    if error := __validate_return_type(metadata.name, metadata.return_type):
         errors.append(error)
 
     return errors
@@ -107,9 +339,16 @@ def dependency(fn: Callable, *,
                primary: bool = False,
                name: str | None = None,
                singleton: bool = False,
-               lazy: bool | None = None) -> SproingDependency:
-    if validation_errors := __validate_dependency(fn):
+               lazy: bool | None = None,
+               scope: str | None = None,
+               pool: SproingPoolConfig | None = None,
+               cache: SproingCacheConfig | None = None,
+               fork: str | None = None,
+               container: Container | None = None) -> SproingDependency:
+    metadata = read_metadata(fn)
+    if validation_errors := __validate_dependency(metadata):
         raise SproingDependencyDefinitionError(fn.__name__, validation_errors)
-    sproing_dependency = SproingDependency(fn, singleton=singleton, lazy=lazy)
-    register_dependency(sproing_dependency, primary, name)
+    sproing_dependency = SproingDependency(fn, singleton=singleton, lazy=lazy, scope=scope, pool=pool, cache=cache,
+                                           fork=fork, container=container, metadata=metadata)
+    sproing_dependency.container.register_dependency(sproing_dependency, primary, name)
     return sproing_dependency
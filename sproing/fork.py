@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import gc
+import os
+from typing import Dict, TYPE_CHECKING
+
+from sproing.container import Container, DEPENDENCY_GRAPH_TYPE, containers, default_container
+
+if TYPE_CHECKING:
+    from sproing.dependency import SproingDependency
+
+# What happens to a singleton built before the process forks: the child keeps using it, builds its own on first use,
+# or refuses to use it.
+SHARE = "share"
+REINIT = "reinit"
+FORBID = "forbid"
+FORK_POLICIES = (SHARE, REINIT, FORBID)
+
+
+class SproingForkDefinitionError(Exception):
+    def __init__(self, dependency_name: str, error: str):
+        super().__init__(f"Error defining dependency '{dependency_name}' fork policy: {error}")
+        self.dependency_name = dependency_name
+        self.error = error
+
+
+class SproingForkError(Exception):
+    def __init__(self, dependency_name: str):
+        super().__init__(f"Dependency '{dependency_name}' was built before the process forked and cannot be used in "
+                         f"the child process.")
+        self.dependency_name = dependency_name
+
+
+def __after_fork_in_child():
+    """Resets the state the child cannot share with its parent, and invalidates the plans holding parent values."""
+    visited = set()
+    for registry in list(containers):
+        for dependency in registry.registered():
+            if dependency not in visited:
+                visited.add(dependency)
+                dependency.after_fork()
+        registry.invalidate()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=__after_fork_in_child)
+
+
+def __validate_shared(dependency: SproingDependency, graph: DEPENDENCY_GRAPH_TYPE):
+    """A shared singleton would keep the parent's instances of the singletons it was built with."""
+    visited = set()
+    stack = list(graph.get(dependency, ()))
+    while stack:
+        requirement = stack.pop()
+        if requirement in visited:
+            continue
+        visited.add(requirement)
+        if requirement.fork in (REINIT, FORBID):
+            raise SproingForkDefinitionError(dependency.name, f"it is shared but depends on '{requirement.name}', "
+                                                              f"whose fork policy is {requirement.fork}.")
+        stack.extend(graph.get(requirement, ()))
+
+
+def prefork_warm_up(max_workers: int | None = None, freeze: bool = True,
+                    container: Container | None = None) -> Dict[SproingDependency, float]:
+    """Builds the singletons to share with the processes forked afterwards, and returns the build time of each one.
+
+    These are the singletons with the share fork policy, and the eager singletons without a fork policy. Sharing a
+    singleton that depends on one with the reinit or forbid policy raises SproingForkDefinitionError. With freeze,
+    the objects built so far are moved out of the garbage collector's reach, so collections in the children do not
+    write to the memory pages they share with the parent. container is the container to warm up, the default one
+    when None.
+    """
+    def shared(dependency: SproingDependency) -> bool:
+        return dependency.singleton and not dependency.is_async and \
+            (dependency.fork == SHARE or (dependency.fork is None and dependency.eager))
+
+    container = default_container if container is None else container
+    graph = container.get_dependency_graph()
+    for dependency in graph:
+        if shared(dependency):
+            __validate_shared(dependency, graph)
+    timings = container.warm_up(max_workers, select=shared)
+    if freeze:
+        gc.freeze()
+    return timings
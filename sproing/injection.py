@@ -1,6 +1,24 @@
-from typing import get_type_hints, Callable, Dict, Any, List
+from __future__ import annotations
 
-from sproing.container import get_dependency, get_named_dependency
+import asyncio
+import time
+from functools import partial, update_wrapper
+from inspect import iscoroutinefunction, signature, Parameter
+from typing import get_type_hints, Callable, Dict, Any, List, Tuple, FrozenSet, Iterable, Type, Sequence
+
+from sproing import manifest
+from sproing import metrics
+from sproing.container import Container, NoSuchSproingDependency, NoSuchNamedSproingDependency, default_container
+from sproing.dependency import SproingDependency
+from sproing.manifest import METADATA_TYPE
+from sproing.metrics import SproingMetricsSink
+from sproing.plan import (PLAN_TYPE, RESOLVERS_TYPE, POOLED_TYPE, EAGER, SproingAll, is_async, is_cacheable,
+                          validate_async_dependencies, resolve_all, build_resolvers, split_async_resolvers,
+                          split_pooled, resolve_async_arguments, resolve_none)
+from sproing.proxy import SproingLazyProxy
+
+# Arguments left to resolve, keyed by the number of positional arguments and the keyword names of a call.
+BINDINGS_TYPE = Dict[Tuple[int, Tuple[str, ...]], Tuple[Tuple[Tuple[str, Any], ...], ...]]
 
 
 class SproingInvalidExplicitArgumentName(Exception):
@@ -10,65 +28,473 @@ class SproingInvalidExplicitArgumentName(Exception):
             f"but the callable does not declare this argument in its list of arguments.")
 
 
+class SproingLazyInjectionError(Exception):
+    def __init__(self, injected_name: str, argname: str, error: str):
+        super().__init__(f"Injected callable '{injected_name}' cannot inject argument {argname} lazily: {error}")
+        self.injected_name = injected_name
+        self.argname = argname
+        self.error = error
+
+
 class SproingInjectionDefinitionError(Exception):
-    def __init__(self, injection_name: str, errors: List[Exception]):
+    def __init__(self, injection_name: str, errors: Sequence[Exception]):
         super().__init__(self.__make_message(injection_name, errors))
         self.injection_name = injection_name
         self.errors = errors
 
     @staticmethod
     def __make_message(injection_name: str,
-                       errors: List[Exception]):
+                       errors: Sequence[Exception]):
         errors_str = "\n\t".join(str(error) for error in errors)
         return f"Bad definition of injection '{injection_name}':\n\t{errors_str}"
 
 
-def __validate_explicit_names(injected_name: str, argspec, explicit: Dict[str, str]):
+def __validate_explicit_names(injected_name: str, argspec, explicit: Dict[str, str]) -> List[Exception]:
+    return [SproingInvalidExplicitArgumentName(injected_name, argname) for argname in explicit if argname not in argspec]
+
+
+def __validate_named_dependencies(injected_name: str, container: Container, explicit: Dict[str, str]):
+    errors = []
+    for depname in explicit.values():
+        try:
+            container.get_named_dependency(depname)
+        except NoSuchNamedSproingDependency as e:
+            errors.append(e)
+    if errors:
+        raise SproingInjectionDefinitionError(injected_name, errors)
+
+
+def __validate_injection(fn: Callable, hints: Dict[str, Type], container: Container, explicit: Dict[str, str] | None,
+                         lazy: bool | FrozenSet[str], defer: bool):
+    """Checks the structure of an injection once, when the callable is decorated."""
+    errors = []
+    if explicit:
+        errors.extend(__validate_explicit_names(fn.__name__, hints, explicit))
+    if lazy and lazy is not True:
+        errors.extend(SproingLazyInjectionError(fn.__name__, argname, "the callable does not inject this argument.")
+                      for argname in lazy if argname not in hints)
+    if errors:
+        raise SproingInjectionDefinitionError(fn.__name__, errors)
+
+    if explicit:
+        if defer:
+            container.defer(partial(__validate_named_dependencies, fn.__name__, container, explicit))
+        else:
+            __validate_named_dependencies(fn.__name__, container, explicit)
+
+
+def __get_lazy_arguments(injected_name: str, plan: PLAN_TYPE, lazy: bool | FrozenSet[str]) -> FrozenSet[str]:
+    """Returns the arguments to inject lazily: the given names, or every eligible argument when lazy is True."""
+    if not lazy:
+        return frozenset()
+
     errors = []
-    for argname in explicit:
-        if argname not in argspec:
-            error = SproingInvalidExplicitArgumentName(injected_name, argname)
+    lazy_names = set()
+    for argname, resolved in plan:
+        if lazy is not True and argname not in lazy:
+            continue
+        if is_async(resolved):
+            error = SproingLazyInjectionError(injected_name, argname, "its dependency is asynchronous.")
+        elif not isinstance(resolved, tuple) and resolved.pool is not None:
+            error = SproingLazyInjectionError(injected_name, argname, "its dependency is pooled.")
+        else:
+            lazy_names.add(argname)
+            continue
+        if lazy is not True:
             errors.append(error)
+
     if errors:
         raise SproingInjectionDefinitionError(injected_name, errors)
+    return frozenset(lazy_names)
 
 
-def __get_explicit_injection(explicit: Dict[str, str]) -> Dict[str, Any]:
-    dependencies = {}
-    for argname, depname in explicit.items():
-        dependencies[argname] = get_named_dependency(depname)()
-    return dependencies
+def __missing_resolver(error: NoSuchSproingDependency) -> Callable[[], Any]:
+    def missing() -> Any:
+        raise error
 
+    return missing
 
-def __get_default_injection(fn: Callable, explicit: Dict[str, str]) -> Dict[str, Any]:
-    argspec = get_type_hints(fn)
-    dependencies = {}
-    for argname, hint in argspec.items():
-        if argname != 'return' and (not explicit or argname not in explicit):
-            resolved = get_dependency(hint)
-            if len(resolved) > 1:
-                dependencies[argname] = [dependency() for dependency in resolved]
-            else:
-                dependencies[argname] = resolved[0]()
-    return dependencies
 
+def __build_injection_plan(fn: Callable, hints: Dict[str, Type], defaults: FrozenSet[str], container: Container,
+                           explicit: Dict[str, str] | None = None) -> Tuple[PLAN_TYPE, RESOLVERS_TYPE]:
+    """Returns the plan of the resolvable arguments, and the resolvers of the other ones.
 
-def __get_injected_dependencies(fn: Callable, explicit: Dict[str, str] | None = None) -> Dict[str, Any]:
-    argspec = get_type_hints(fn)
-    dependencies = {}
+    Unresolvable arguments only fail the calls that do not supply them. Optional arguments are not injected when
+    nothing provides them: those with a default keep it, and the Optional[T] ones get None.
+    """
+    plan: List[Tuple[str, SproingDependency | SproingAll]] = []
+    missing: List[Tuple[str, Callable[[], Any]]] = []
     if explicit:
-        __validate_explicit_names(fn.__name__, argspec, explicit)
-        dependencies.update(__get_explicit_injection(explicit))
-    dependencies.update(__get_default_injection(fn, explicit))
-    return dependencies
+        for argname, depname in explicit.items():
+            plan.append((argname, container.get_named_dependency(depname)))
+    for argname, hint in hints.items():
+        if explicit and argname in explicit:
+            continue
+        try:
+            resolved, nones = container.resolve_parameters({argname: hint}, defaults)
+        except NoSuchSproingDependency as e:
+            missing.append((argname, __missing_resolver(e)))
+            continue
+        plan.extend(resolved)
+        missing.extend((name, resolve_none) for name in nones)
+
+    resolved_plan = tuple(plan)
+    if not iscoroutinefunction(fn) and (errors := validate_async_dependencies(fn.__name__, resolved_plan)):
+        raise SproingInjectionDefinitionError(fn.__name__, errors)
+    return resolved_plan, tuple(missing)
+
+
+def __lazy_resolver(resolve: Callable[[], Any]) -> Callable[[], Any]:
+    if isinstance(resolve, SproingDependency) and resolve.singleton:
+        def resolve_singleton() -> Any:
+            return resolve.value if resolve.initialized else SproingLazyProxy(resolve)
+
+        return resolve_singleton
+    return partial(SproingLazyProxy, resolve)
+
+
+def __make_lazy(resolvers: RESOLVERS_TYPE, lazy: FrozenSet[str]) -> RESOLVERS_TYPE:
+    if not lazy:
+        return resolvers
+    return tuple((argname, __lazy_resolver(resolve) if argname in lazy else resolve) for argname, resolve in resolvers)
+
+
+def __compile_value(dependency: SproingDependency, namespace: Dict[str, Any]) -> Tuple[str, bool]:
+    local_name = f"__dep_{len(namespace)}"
+    # Singleton values are bound as constants, unless metrics must count every resolution.
+    if dependency.singleton and metrics.current_sink is None:
+        if not dependency.is_async:
+            namespace[local_name] = dependency()
+            return local_name, False
+        if dependency.initialized:
+            namespace[local_name] = dependency.value
+            return local_name, False
+    namespace[local_name] = dependency.strategy
+    return f"{local_name}()", dependency.is_async
+
+
+def __compile_argument(resolved: SproingDependency | SproingAll, namespace: Dict[str, Any]) -> Tuple[str, bool]:
+    if not isinstance(resolved, tuple):
+        return __compile_value(resolved, namespace)
+    local_name = f"__dep_{len(namespace)}"
+    if is_async(resolved) or resolved.mode != EAGER:
+        namespace[local_name] = resolve_all(resolved)
+        return f"{local_name}()", is_async(resolved)
+    if is_cacheable(resolved) and metrics.current_sink is None:
+        namespace[local_name] = tuple(dependency() for dependency in resolved)
+        return local_name, False
+    values = "".join(f"{__compile_value(dependency, namespace)[0]}, " for dependency in resolved)
+    return f"({values})", False
+
+
+def __compile_pooled(body: List[str], pooled: POOLED_TYPE, namespace: Dict[str, Any], awaited: bool) -> List[str]:
+    """Wraps the generated body so pooled instances are acquired before the call and released after it."""
+    for index, (_, pool) in reversed(list(enumerate(pooled))):
+        acquire_name, release_name = f"__acquire_{index}", f"__release_{index}"
+        namespace[acquire_name] = pool.acquire_async if awaited else pool.acquire
+        namespace[release_name] = pool.release
+        body = [f"__pooled_{index} = {'await ' if awaited else ''}{acquire_name}()",
+                "try:",
+                *(f"    {line}" for line in body),
+                "finally:",
+                f"    {release_name}(__pooled_{index})"]
+    return body
+
+
+def __compile_injection(fn: Callable, positional: Tuple[str, ...], receiver: bool, container: Container,
+                        plan: PLAN_TYPE, missing: RESOLVERS_TYPE, lazy: FrozenSet[str], generation: int,
+                        recompile: Callable[[], Callable]) -> Callable:
+    namespace = {"__fn": fn, "__container": container, "__generation": generation, "__recompile": recompile,
+                 "__gather": asyncio.gather}
+    plan, pooled = split_pooled(plan)
+    awaited = iscoroutinefunction(fn)
+    # Calls with caller-supplied arguments take the generic path, binding only the missing ones.
+    cache = metrics.current_sink is None
+    if awaited:
+        sync_resolvers, async_resolvers = split_async_resolvers(plan, cache)
+        namespace["__call_bound"] = partial(__call_bound_async, fn, positional,
+                                            __make_lazy(sync_resolvers, lazy) + missing, async_resolvers, pooled,
+                                            metrics.current_sink, {})
+    else:
+        namespace["__call_bound"] = partial(__call_bound, fn, positional,
+                                            __make_lazy(build_resolvers(plan, cache), lazy) + missing, pooled,
+                                            metrics.current_sink, {})
+    arguments = [f"{argname}=__pooled_{index}" for index, (argname, _) in enumerate(pooled)]
+    awaitables: List[str] = []
+    for argname, resolved in plan:
+        if argname in lazy:
+            local_name = f"__dep_{len(namespace)}"
+            namespace[local_name] = __lazy_resolver(resolve_all(resolved) if isinstance(resolved, tuple) else resolved)
+            arguments.append(f"{argname}={local_name}()")
+            continue
+        value, awaitable = __compile_argument(resolved, namespace)
+        if awaitable:
+            arguments.append(f"{argname}=__awaited[{len(awaitables)}]")
+            awaitables.append(value)
+        else:
+            arguments.append(f"{argname}={value}")
+    for argname, resolve in missing:
+        if resolve is resolve_none:
+            arguments.append(f"{argname}=None")
+            continue
+        local_name = f"__dep_{len(namespace)}"
+        namespace[local_name] = resolve
+        arguments.append(f"{argname}={local_name}()")
+
+    prefix = "__receiver, " if receiver else ""
+    body = [f"return {'await ' if awaited else ''}__fn({prefix}{', '.join(arguments)})"]
+    if metrics.current_sink is not None:
+        namespace.update({"__sink": metrics.current_sink, "__perf_counter": time.perf_counter, "__name": fn.__name__})
+        body = [f"__arguments = dict({', '.join(arguments)})",
+                "__sink.record_injection(__name, __perf_counter() - __start)",
+                f"return {'await ' if awaited else ''}__fn({prefix}**__arguments)"]
+    if awaitables:
+        body.insert(0, f"__awaited = await __gather({', '.join(awaitables)})")
+    if metrics.current_sink is not None:
+        body.insert(0, "__start = __perf_counter()")
+    body = __compile_pooled(body, pooled, namespace, awaited)
+
+    source = [f"def __create_fn__({', '.join(namespace)}):",
+              f"    {'async ' if awaited else ''}def injected({prefix}*__args, **__kwargs):",
+              "        if __container.generation != __generation:",
+              f"            return {'await ' if awaited else ''}__recompile()({prefix}*__args, **__kwargs)",
+              "        if __args or __kwargs:",
+              f"            return {'await ' if awaited else ''}__call_bound(({prefix}*__args,), __kwargs)",
+              *(f"        {line}" for line in body),
+              "    return injected"]
+    local_namespace: Dict[str, Any] = {}
+    exec("\n".join(source), {}, local_namespace)
+    return local_namespace["__create_fn__"](**namespace)
+
+
+def __call_managed(fn: Callable, resolvers: RESOLVERS_TYPE, pooled: POOLED_TYPE, sink: SproingMetricsSink | None,
+                   args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """Calls fn when pooled instances must be released afterwards or the resolution time must be recorded."""
+    start = time.perf_counter()
+    acquired = {}
+    try:
+        for argname, pool in pooled:
+            acquired[argname] = pool.acquire()
+        dependencies = {argname: resolve() for argname, resolve in resolvers}
+        if sink is not None:
+            sink.record_injection(fn.__name__, time.perf_counter() - start)
+        return fn(*args, **kwargs, **dependencies, **acquired)
+    finally:
+        for argname, pool in pooled:
+            if argname in acquired:
+                pool.release(acquired[argname])
+
+
+async def __call_managed_async(fn: Callable, sync_resolvers: RESOLVERS_TYPE, async_resolvers: RESOLVERS_TYPE,
+                               pooled: POOLED_TYPE, sink: SproingMetricsSink | None, args: Tuple[Any, ...],
+                               kwargs: Dict[str, Any]) -> Any:
+    start = time.perf_counter()
+    acquired = {}
+    try:
+        for argname, pool in pooled:
+            acquired[argname] = await pool.acquire_async()
+        dependencies = await resolve_async_arguments(sync_resolvers, async_resolvers)
+        if sink is not None:
+            sink.record_injection(fn.__name__, time.perf_counter() - start)
+        return await fn(*args, **kwargs, **dependencies, **acquired)
+    finally:
+        for argname, pool in pooled:
+            if argname in acquired:
+                pool.release(acquired[argname])
+
+
+def __get_positional(fn: Callable) -> Tuple[str, ...]:
+    return tuple(name for name, parameter in signature(fn).parameters.items()
+                 if parameter.kind in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD))
+
+
+def __introspect(fn: Callable) -> METADATA_TYPE:
+    hints = get_type_hints(fn)
+    hints.pop('return', None)
+    defaults = [name for name, parameter in signature(fn).parameters.items()
+                if parameter.default is not Parameter.empty]
+    return hints, {"positional": list(__get_positional(fn)), "defaults": defaults}
+
+
+def __bind(positional: Tuple[str, ...], groups: Tuple[Tuple[Tuple[str, Any], ...], ...], bindings: BINDINGS_TYPE,
+           args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+    """Drops the arguments supplied by the caller from each group, caching the result per shape of the call."""
+    shape = (len(args), tuple(kwargs))
+    bound = bindings.get(shape)
+    if bound is None:
+        supplied = set(positional[:len(args)]).union(kwargs)
+        bound = tuple(tuple(entry for entry in group if entry[0] not in supplied) for group in groups)
+        bindings[shape] = bound
+    return bound
+
+
+def __call_bound(fn: Callable, positional: Tuple[str, ...], resolvers: RESOLVERS_TYPE, pooled: POOLED_TYPE,
+                 sink: SproingMetricsSink | None, bindings: BINDINGS_TYPE, args: Tuple[Any, ...],
+                 kwargs: Dict[str, Any]) -> Any:
+    resolvers, pooled = __bind(positional, (resolvers, pooled), bindings, args, kwargs)
+    if pooled or sink is not None:
+        return __call_managed(fn, resolvers, pooled, sink, args, kwargs)
+    return fn(*args, **kwargs, **{argname: resolve() for argname, resolve in resolvers})
+
+
+async def __call_bound_async(fn: Callable, positional: Tuple[str, ...], sync_resolvers: RESOLVERS_TYPE,
+                             async_resolvers: RESOLVERS_TYPE, pooled: POOLED_TYPE,
+                             sink: SproingMetricsSink | None, bindings: BINDINGS_TYPE, args: Tuple[Any, ...],
+                             kwargs: Dict[str, Any]) -> Any:
+    sync_resolvers, async_resolvers, pooled = __bind(positional, (sync_resolvers, async_resolvers, pooled), bindings,
+                                                     args, kwargs)
+    if pooled or sink is not None:
+        return await __call_managed_async(fn, sync_resolvers, async_resolvers, pooled, sink, args, kwargs)
+    return await fn(*args, **kwargs, **await resolve_async_arguments(sync_resolvers, async_resolvers))
+
+
+def __inject_generic(fn: Callable, positional: Tuple[str, ...], receiver: bool, hints: Dict[str, Type],
+                     defaults: FrozenSet[str], container: Container, explicit: Dict[str, str] | None,
+                     lazy: bool | FrozenSet[str]) -> Callable:
+    cached_resolvers: Tuple[int | None, RESOLVERS_TYPE, POOLED_TYPE, SproingMetricsSink | None, BINDINGS_TYPE] = \
+        (None, (), (), None, {})
+
+    def refresh() -> Tuple[int | None, RESOLVERS_TYPE, POOLED_TYPE, SproingMetricsSink | None, BINDINGS_TYPE]:
+        nonlocal cached_resolvers
+        generation = container.generation
+        plan, missing = __build_injection_plan(fn, hints, defaults, container, explicit)
+        lazy_names = __get_lazy_arguments(fn.__name__, plan, lazy)
+        plan, pooled = split_pooled(plan)
+        resolvers = __make_lazy(build_resolvers(plan, metrics.current_sink is None), lazy_names) + missing
+        cached_resolvers = (generation, resolvers, pooled, metrics.current_sink, {})
+        return cached_resolvers
+
+    if receiver:
+        # The instance is always passed, so calls without other arguments keep the fast path.
+        def injected_method(instance, *args, **kwargs) -> Any:
+            generation, resolvers, pooled, sink, bindings = cached_resolvers
+            if generation != container.generation:
+                generation, resolvers, pooled, sink, bindings = refresh()
+            if args or kwargs:
+                return __call_bound(fn, positional, resolvers, pooled, sink, bindings, (instance, *args), kwargs)
+            if pooled or sink is not None:
+                return __call_managed(fn, resolvers, pooled, sink, (instance,), kwargs)
+            return fn(instance, **{argname: resolve() for argname, resolve in resolvers})
+
+        return injected_method
+
+    def injected(*args, **kwargs) -> Any:
+        generation, resolvers, pooled, sink, bindings = cached_resolvers
+        if generation != container.generation:
+            generation, resolvers, pooled, sink, bindings = refresh()
+        if args or kwargs:
+            return __call_bound(fn, positional, resolvers, pooled, sink, bindings, args, kwargs)
+        if pooled or sink is not None:
+            return __call_managed(fn, resolvers, pooled, sink, args, kwargs)
+        return fn(**{argname: resolve() for argname, resolve in resolvers})
+
+    return injected
+
+
+def __inject_async(fn: Callable, positional: Tuple[str, ...], hints: Dict[str, Type], defaults: FrozenSet[str],
+                   container: Container, explicit: Dict[str, str] | None, lazy: bool | FrozenSet[str]) -> Callable:
+    cached_resolvers: Tuple[int | None, RESOLVERS_TYPE, RESOLVERS_TYPE, POOLED_TYPE, SproingMetricsSink | None,
+                            BINDINGS_TYPE] = (None, (), (), (), None, {})
+
+    async def injected(*args, **kwargs) -> Any:
+        nonlocal cached_resolvers
+        generation, sync_resolvers, async_resolvers, pooled, sink, bindings = cached_resolvers
+        if generation != container.generation:
+            generation = container.generation
+            plan, missing = __build_injection_plan(fn, hints, defaults, container, explicit)
+            lazy_names = __get_lazy_arguments(fn.__name__, plan, lazy)
+            plan, pooled = split_pooled(plan)
+            sync_resolvers, async_resolvers = split_async_resolvers(plan, metrics.current_sink is None)
+            sync_resolvers = __make_lazy(sync_resolvers, lazy_names) + missing
+            sink = metrics.current_sink
+            bindings = {}
+            cached_resolvers = (generation, sync_resolvers, async_resolvers, pooled, sink, bindings)
+
+        if args or kwargs:
+            return await __call_bound_async(fn, positional, sync_resolvers, async_resolvers, pooled, sink, bindings,
+                                            args, kwargs)
+        if pooled or sink is not None:
+            return await __call_managed_async(fn, sync_resolvers, async_resolvers, pooled, sink, args, kwargs)
+        return await fn(**await resolve_async_arguments(sync_resolvers, async_resolvers))
+
+    return injected
+
+
+def __inject_compiled(fn: Callable, positional: Tuple[str, ...], receiver: bool, hints: Dict[str, Type],
+                      defaults: FrozenSet[str], container: Container, explicit: Dict[str, str] | None,
+                      lazy: bool | FrozenSet[str]) -> Callable:
+    compiled: Callable
+
+    def recompile() -> Callable:
+        nonlocal compiled
+        generation = container.generation
+        plan, missing = __build_injection_plan(fn, hints, defaults, container, explicit)
+        lazy_names = __get_lazy_arguments(fn.__name__, plan, lazy)
+        compiled = __compile_injection(fn, positional, receiver, container, plan, missing, lazy_names, generation,
+                                       recompile)
+        return compiled
+
+    if iscoroutinefunction(fn):
+        async def bootstrap_async(*args, **kwargs) -> Any:
+            return await recompile()(*args, **kwargs)
+
+        compiled = bootstrap_async
+
+        async def injected_async(*args, **kwargs) -> Any:
+            return await compiled(*args, **kwargs)
+
+        return injected_async
+
+    def bootstrap(*args, **kwargs) -> Any:
+        return recompile()(*args, **kwargs)
+
+    compiled = bootstrap
+
+    def injected(*args, **kwargs) -> Any:
+        return compiled(*args, **kwargs)
+
+    return injected
+
+
+def inject(*, explicit=None, compile: bool = False, lazy: bool | Iterable[str] = False,
+           container: Container | None = None, defer: bool = False) -> Callable:
+    """Decorates a callable so its type-hinted arguments are resolved from the container.
+
+    Decorating a class injects its __init__, and decorated methods are passed their instance as usual.
+
+    explicit maps argument names to named dependencies. compile generates a specialized wrapper for the callable.
+    lazy passes proxies that only build their dependency on first use, for every argument when True or for the
+    given argument names. container is the container to resolve from, the default one when None.
+
+    Arguments passed by the caller are used as given, and only the missing ones are resolved.
 
+    The explicit and lazy argument names are validated when the callable is decorated, and so are the named
+    dependencies, unless defer is True: then they are checked when the container is sealed.
+    """
+    container = default_container if container is None else container
 
-def inject(*, explicit=None) -> Callable:
-    def wrapper(fn: Callable) -> Callable:
-        def injected(*_, **__) -> Callable:
-            dependencies = __get_injected_dependencies(fn, explicit)
-            return fn(**dependencies)
+    def wrapper(fn: Callable, receiver: bool = False) -> Callable:
+        if isinstance(fn, type):
+            # Classes are injected through __init__, so their instances are built with the resolved arguments.
+            if fn.__init__ is not object.__init__:
+                fn.__init__ = wrapper(fn.__init__, receiver=True)
+            return fn
 
-        return injected
+        lazy_names = lazy if isinstance(lazy, bool) else frozenset(lazy)
+        read = partial(__introspect, fn)
+        if manifest.current_manifest is None:
+            hints, fields = read()
+        else:
+            hints, fields = manifest.current_manifest.get("injections", fn, read)
+        positional = tuple(fields["positional"])
+        defaults = frozenset(fields["defaults"])
+        __validate_injection(fn, hints, container, explicit, lazy_names, defer)
+        if compile:
+            injected = __inject_compiled(fn, positional, receiver, hints, defaults, container, explicit, lazy_names)
+        elif iscoroutinefunction(fn):
+            injected = __inject_async(fn, positional, hints, defaults, container, explicit, lazy_names)
+        else:
+            injected = __inject_generic(fn, positional, receiver, hints, defaults, container, explicit, lazy_names)
+        return update_wrapper(injected, fn)
 
     return wrapper
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import typing
+from typing import Callable, Any, Dict, Tuple
+
+# Bumped when the fields stored for a callable change, so manifests written by other versions are rebuilt.
+FORMAT = 3
+# Key of the section holding the package index written by scan(), which can share the manifest file.
+SCAN_SECTION = "__scan__"
+# Introspected metadata of a callable: the types it declares by name, and the other fields as JSON values.
+METADATA_TYPE = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def source_hash(source: bytes) -> str:
+    return importlib.util.source_hash(source).hex()
+
+
+def read_manifest_file(path: str | None) -> Dict[str, Any]:
+    if path is None or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        # A broken manifest is rebuilt from the sources.
+        return {}
+
+
+def write_manifest_file(path: str, manifest: Dict[str, Any]):
+    # Written aside and moved, so concurrent readers never see a partial file.
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def decode_type(reference: str | Dict[str, Any]) -> Any:
+    """Returns the type a reference written by encode_type points to, importing its module if needed."""
+    if isinstance(reference, dict):
+        return decode_type(reference["origin"])[tuple(map(decode_type, reference["args"]))]
+    module_name, qualname = reference.split(":")
+    value = sys.modules.get(module_name) or importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        value = getattr(value, attribute)
+    return value
+
+
+def __get_reference(type_hint: Any) -> str | Dict[str, Any] | None:
+    origin = typing.get_origin(type_hint)
+    if origin is not None:
+        origin_reference = __get_reference(origin)
+        arguments = [__get_reference(argument) for argument in typing.get_args(type_hint)]
+        if origin_reference is None or None in arguments:
+            return None
+        return {"origin": origin_reference, "args": arguments}
+    if not isinstance(type_hint, type) or "<locals>" in type_hint.__qualname__:
+        return None
+    return f"{type_hint.__module__}:{type_hint.__qualname__}"
+
+
+def encode_type(type_hint: Any) -> str | Dict[str, Any] | None:
+    """Returns a JSON reference to a type hint, or None when decoding it would not give the same hint back."""
+    reference = __get_reference(type_hint)
+    try:
+        if reference is None or decode_type(reference) != type_hint:
+            return None
+    except (ImportError, AttributeError, TypeError):
+        return None
+    return reference
+
+
+class SproingManifest:
+    """Persists the introspected metadata of providers and injected callables between runs.
+
+    Entries are grouped by module along with the hash of its source, so the entries of a module are dropped and
+    rebuilt once its source changes. Callables defined in functions, and those with type hints that cannot be
+    referenced by module and name, are introspected every time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.modules: Dict[str, Any] = read_manifest_file(path)
+        # The scan section is kept as found in the file when saving, as scan() may have rewritten it since.
+        self.modules.pop(SCAN_SECTION, None)
+        if self.modules.get("__format__") != FORMAT:
+            self.modules = {"__format__": FORMAT}
+        self.hashes: Dict[str, str | None] = {}
+        self.changed = False
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __hash_module(self, module_name: str) -> str | None:
+        if module_name not in self.hashes:
+            path = getattr(sys.modules.get(module_name), "__file__", None)
+            try:
+                with open(path, "rb") as file:
+                    self.hashes[module_name] = source_hash(file.read())
+            except (OSError, TypeError):
+                self.hashes[module_name] = None
+        return self.hashes[module_name]
+
+    def __get_module(self, module_name: str) -> Dict[str, Any] | None:
+        module_hash = self.__hash_module(module_name)
+        if module_hash is None:
+            return None
+        module = self.modules.get(module_name)
+        if module is None or module.get("hash") != module_hash or "providers" not in module or \
+                "injections" not in module:
+            module = self.modules[module_name] = {"hash": module_hash, "providers": {}, "injections": {}}
+            self.changed = True
+        return module
+
+    def get(self, kind: str, fn: Callable, read: Callable[[], METADATA_TYPE]) -> METADATA_TYPE:
+        """Returns the stored metadata of fn, or reads and stores it when missing or stale.
+
+        kind is the group of entries fn belongs to, either "providers" or "injections".
+        """
+        if "<locals>" in fn.__qualname__:
+            return read()
+        with self.lock:
+            module = self.__get_module(fn.__module__)
+            entry = None if module is None else module[kind].get(fn.__qualname__)
+        if entry is not None:
+            try:
+                types = {name: decode_type(reference) for name, reference in entry["types"].items()}
+                self.hits += 1
+                return types, entry["fields"]
+            except (ImportError, AttributeError, TypeError, ValueError, KeyError):
+                # The types moved or were renamed without changing this module: read them again.
+                pass
+
+        self.misses += 1
+        types, fields = read()
+        references = {name: encode_type(type_hint) for name, type_hint in types.items()}
+        if module is not None and None not in references.values():
+            with self.lock:
+                module[kind][fn.__qualname__] = {"types": references, "fields": fields}
+                self.changed = True
+        return types, fields
+
+    def save(self):
+        """Writes the manifest back if any entry was added or rebuilt since it was loaded."""
+        with self.lock:
+            if self.changed:
+                sections = read_manifest_file(self.path)
+                if SCAN_SECTION in sections:
+                    write_manifest_file(self.path, {**self.modules, SCAN_SECTION: sections[SCAN_SECTION]})
+                else:
+                    write_manifest_file(self.path, self.modules)
+                self.changed = False
+
+
+current_manifest: SproingManifest | None = None
+
+
+def use_manifest(path: str | None) -> SproingManifest | None:
+    """Reads the metadata of providers and injected callables from the manifest at path, or stops when None.
+
+    Call save_manifest() once the application is initialized to store the entries read during this run.
+    """
+    global current_manifest
+    current_manifest = None if path is None else SproingManifest(path)
+    return current_manifest
+
+
+def save_manifest():
+    if current_manifest is not None:
+        current_manifest.save()
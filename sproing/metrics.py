@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Callable, Any, Dict, Protocol
+
+from sproing import container
+
+# Upper bounds of the latency histogram buckets in seconds, doubling from 1 microsecond to about 2 minutes.
+BUCKETS = tuple(1e-6 * 2 ** exponent for exponent in range(28))
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class SproingMetricsSink(Protocol):
+    """Receives the measurements taken while metrics are enabled."""
+
+    def record_call(self, dependency_name: str):
+        ...
+
+    def record_build(self, dependency_name: str, seconds: float):
+        ...
+
+    def record_injection(self, injected_name: str, seconds: float):
+        ...
+
+
+class SproingHistogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Estimates a percentile as the upper bound of the bucket it falls into."""
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return BUCKETS[index] if index < len(BUCKETS) else float("inf")
+        return 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        snapshot = {"count": self.count, "total": self.total}
+        for fraction in PERCENTILES:
+            snapshot[f"p{round(fraction * 100)}"] = self.percentile(fraction)
+        return snapshot
+
+
+class SproingProviderMetrics:
+
+    def __init__(self):
+        self.calls = 0
+        self.builds = SproingHistogram()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "builds": self.builds.snapshot()}
+
+
+class SproingMetrics:
+    """Default sink, keeping counters and latency histograms in memory."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.providers: Dict[str, SproingProviderMetrics] = {}
+        self.injections: Dict[str, SproingHistogram] = {}
+
+    def __get_provider(self, dependency_name: str) -> SproingProviderMetrics:
+        provider = self.providers.get(dependency_name)
+        if provider is None:
+            provider = self.providers.setdefault(dependency_name, SproingProviderMetrics())
+        return provider
+
+    def record_call(self, dependency_name: str):
+        with self.lock:
+            self.__get_provider(dependency_name).calls += 1
+
+    def record_build(self, dependency_name: str, seconds: float):
+        with self.lock:
+            self.__get_provider(dependency_name).builds.record(seconds)
+
+    def record_injection(self, injected_name: str, seconds: float):
+        with self.lock:
+            self.injections.setdefault(injected_name, SproingHistogram()).record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return {"providers": {name: provider.snapshot() for name, provider in self.providers.items()},
+                    "injections": {name: histogram.snapshot() for name, histogram in self.injections.items()}}
+
+
+current_sink: SproingMetricsSink | None = None
+
+
+def instrument_build(dependency_name: str, build: Callable[[], Any], is_async: bool,
+                     sink: SproingMetricsSink) -> Callable[[], Any]:
+    if is_async:
+        async def timed_build_async() -> Any:
+            start = time.perf_counter()
+            value = await build()
+            sink.record_build(dependency_name, time.perf_counter() - start)
+            return value
+
+        return timed_build_async
+
+    def timed_build() -> Any:
+        start = time.perf_counter()
+        value = build()
+        sink.record_build(dependency_name, time.perf_counter() - start)
+        return value
+
+    return timed_build
+
+
+def instrument_strategy(dependency_name: str, strategy: Callable[[], Any],
+                        sink: SproingMetricsSink) -> Callable[[], Any]:
+    def counted_strategy() -> Any:
+        sink.record_call(dependency_name)
+        return strategy()
+
+    return counted_strategy
+
+
+def __install(sink: SproingMetricsSink | None):
+    global current_sink
+    current_sink = sink
+    container.install_strategies()
+
+
+def enable_metrics(sink: SproingMetricsSink | None = None) -> SproingMetricsSink:
+    """Starts recording provider and injection metrics into the sink, an in-memory SproingMetrics by default.
+
+    Dependencies only swap in instrumented strategies while metrics are enabled, so they cost nothing otherwise.
+    """
+    sink = SproingMetrics() if sink is None else sink
+    __install(sink)
+    return sink
+
+
+def disable_metrics():
+    __install(None)
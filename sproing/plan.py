@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Callable, Any, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sproing.dependency import SproingDependency
+    from sproing.pool import SproingPool
+
+# How the members of an All[T] argument are built: all of them in the calling thread, on demand while iterating, or
+# the factory members in a thread pool.
+EAGER = "eager"
+LAZY = "lazy"
+PARALLEL = "parallel"
+
+
+class SproingAll(tuple):
+    """The dependencies resolved for an All[T] argument, and how to build them."""
+
+    # Tuple subclasses cannot declare slots for their own attributes.
+    mode: str
+
+    def __new__(cls, dependencies: Iterable[SproingDependency], mode: str = EAGER):
+        resolved = super().__new__(cls, dependencies)
+        resolved.mode = mode
+        return resolved
+
+
+# Each entry pairs an argument name with the dependency resolved for it, or the dependencies of an All[T] argument.
+PLAN_TYPE = Tuple[Tuple[str, "SproingDependency | SproingAll"], ...]
+RESOLVERS_TYPE = Tuple[Tuple[str, Callable[[], Any]], ...]
+# The pools of the pooled arguments of a plan, which are acquired for the duration of a call and released.
+POOLED_TYPE = Tuple[Tuple[str, "SproingPool"], ...]
+
+__executor: ThreadPoolExecutor | None = None
+__executor_lock = threading.Lock()
+
+
+class SproingAsyncDependencyError(Exception):
+    def __init__(self, injected_name: str, argname: str):
+        super().__init__(
+            f"Injected callable '{injected_name}' is synchronous, but the dependency injected for argument "
+            f"{argname} is asynchronous.")
+
+
+def resolve_none() -> None:
+    """Resolves the Optional[T] arguments nothing provides."""
+    return None
+
+
+def is_async(resolved: SproingDependency | SproingAll) -> bool:
+    if isinstance(resolved, tuple):
+        # Lazy members are iterated synchronously, asynchronous ones as awaitables.
+        return resolved.mode != LAZY and any(dependency.is_async for dependency in resolved)
+    return resolved.is_async
+
+
+def validate_async_dependencies(injected_name: str, plan: PLAN_TYPE) -> List[SproingAsyncDependencyError]:
+    return [SproingAsyncDependencyError(injected_name, argname) for argname, resolved in plan if is_async(resolved)]
+
+
+async def await_dependency(dependency: SproingDependency) -> Any:
+    if dependency.is_async:
+        return await dependency()
+    return dependency()
+
+
+def is_cacheable(resolved: SproingAll) -> bool:
+    """Whether the values of an All[T] argument never change, as every member is a synchronous singleton."""
+    return resolved.mode == EAGER and all(dependency.singleton and not dependency.is_async for dependency in resolved)
+
+
+def __get_executor() -> ThreadPoolExecutor:
+    global __executor
+    if __executor is None:
+        with __executor_lock:
+            if __executor is None:
+                __executor = ThreadPoolExecutor(thread_name_prefix="sproing")
+    return __executor
+
+
+def submit_in_context(fn: Callable[[], Any]) -> Future:
+    """Runs fn in the shared thread pool, in a copy of the caller's context so it sees the same scope and trace."""
+    return __get_executor().submit(copy_context().run, fn)
+
+
+def __reset_executor():
+    # The executor's threads do not survive a fork, so the child process starts its own.
+    global __executor, __executor_lock
+    __executor = None
+    __executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=__reset_executor)
+
+
+def __resolve_parallel(resolved: SproingAll) -> Tuple[Any, ...]:
+    futures = [None if dependency.singleton else submit_in_context(dependency) for dependency in resolved]
+    return tuple(dependency() if future is None else future.result() for dependency, future in zip(resolved, futures))
+
+
+def resolve_all(resolved: SproingAll, cache: bool = False) -> Callable[[], Any]:
+    """Returns the resolver of an All[T] argument, which produces a tuple, or an iterator in lazy mode.
+
+    Singleton members are built in the calling thread in parallel mode, which only makes sense for factory members
+    that are expensive to build. With cache, the tuple of an argument whose members are all singletons is reused.
+    """
+    if resolved.mode == LAZY:
+        def resolve_all_lazy() -> Iterator[Any]:
+            return (dependency() for dependency in resolved)
+
+        return resolve_all_lazy
+
+    if is_async(resolved):
+        async def resolve_all_async() -> Tuple[Any, ...]:
+            return tuple(await asyncio.gather(*(await_dependency(dependency) for dependency in resolved)))
+
+        return resolve_all_async
+
+    if resolved.mode == PARALLEL:
+        def resolve_all_parallel() -> Tuple[Any, ...]:
+            return __resolve_parallel(resolved)
+
+        return resolve_all_parallel
+
+    if cache and is_cacheable(resolved):
+        values = None
+
+        def resolve_all_cached() -> Tuple[Any, ...]:
+            nonlocal values
+            if values is None:
+                values = tuple(dependency() for dependency in resolved)
+            return values
+
+        return resolve_all_cached
+
+    def resolve_all_sync() -> Tuple[Any, ...]:
+        return tuple(dependency() for dependency in resolved)
+
+    return resolve_all_sync
+
+
+def build_resolvers(plan: PLAN_TYPE, cache: bool = False) -> RESOLVERS_TYPE:
+    resolvers = []
+    for argname, resolved in plan:
+        if isinstance(resolved, tuple):
+            resolvers.append((argname, resolve_all(resolved, cache)))
+        else:
+            resolvers.append((argname, resolved))
+    return tuple(resolvers)
+
+
+def split_async_resolvers(plan: PLAN_TYPE, cache: bool = False) -> Tuple[RESOLVERS_TYPE, RESOLVERS_TYPE]:
+    sync_resolvers = []
+    async_resolvers = []
+    for (argname, resolved), resolver in zip(plan, build_resolvers(plan, cache)):
+        if is_async(resolved):
+            async_resolvers.append(resolver)
+        else:
+            sync_resolvers.append(resolver)
+    return tuple(sync_resolvers), tuple(async_resolvers)
+
+
+def split_pooled(plan: PLAN_TYPE) -> Tuple[PLAN_TYPE, POOLED_TYPE]:
+    """Separates the pooled dependencies of a plan from the others, returning their pools."""
+    pooled = tuple((argname, resolved.pool) for argname, resolved in plan
+                   if not isinstance(resolved, tuple) and resolved.pool is not None)
+    if not pooled:
+        return plan, pooled
+    names = {argname for argname, _ in pooled}
+    return tuple(entry for entry in plan if entry[0] not in names), pooled
+
+
+async def resolve_async_arguments(sync_resolvers: RESOLVERS_TYPE, async_resolvers: RESOLVERS_TYPE) -> dict:
+    arguments = {argname: resolve() for argname, resolve in sync_resolvers}
+    if async_resolvers:
+        values = await asyncio.gather(*(resolve() for _, resolve in async_resolvers))
+        arguments.update(zip((argname for argname, _ in async_resolvers), values))
+    return arguments
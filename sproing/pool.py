@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from inspect import isawaitable
+from typing import Callable, Any, NamedTuple, Deque, Tuple
+
+
+class SproingPoolConfig(NamedTuple):
+    max_size: int
+    min_idle: int
+    reset: Callable[[Any], Any] | None
+    timeout: float | None
+
+
+class SproingPoolStats(NamedTuple):
+    hits: int
+    misses: int
+    waits: int
+    wait_time: float
+    size: int
+    idle: int
+
+
+class SproingPoolDefinitionError(Exception):
+    def __init__(self, dependency_name: str, error: str):
+        super().__init__(f"Error defining dependency '{dependency_name}' pool: {error}")
+        self.dependency_name = dependency_name
+        self.error = error
+
+
+class SproingPooledDependencyError(Exception):
+    def __init__(self, dependency_name: str, error: str):
+        super().__init__(f"Pooled dependency '{dependency_name}' {error}")
+        self.dependency_name = dependency_name
+        self.error = error
+
+
+class SproingPoolTimeoutError(Exception):
+    def __init__(self, dependency_name: str, timeout: float):
+        super().__init__(f"Timed out after {timeout}s waiting for an instance of pooled dependency "
+                         f"'{dependency_name}'.")
+        self.dependency_name = dependency_name
+        self.timeout = timeout
+
+
+def pooled(max_size: int, min_idle: int = 0,
+           reset: Callable[[Any], Any] | None = None,
+           timeout: float | None = None) -> SproingPoolConfig:
+    """Configures a dependency to lend instances from a bounded pool instead of building one per injection.
+
+    At most max_size instances exist at once, and warming up the container builds min_idle of them upfront. The
+    reset hook is called with every instance returned to the pool; an instance whose reset fails is discarded.
+    """
+    return SproingPoolConfig(max_size, min_idle, reset, timeout)
+
+
+class SproingPool:
+
+    def __init__(self, dependency_name: str, build: Callable[[], Any], config: SproingPoolConfig):
+        if config.max_size < 1:
+            raise SproingPoolDefinitionError(dependency_name, "max_size must be at least 1.")
+        if not 0 <= config.min_idle <= config.max_size:
+            raise SproingPoolDefinitionError(dependency_name, "min_idle must be between 0 and max_size.")
+
+        self.dependency_name = dependency_name
+        self.build = build
+        self.config = config
+        self.idle: Deque[Any] = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+        # Coroutines waiting for an instance, with the event loop each one runs on.
+        self.waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def __take(self) -> Tuple[bool, Any] | None:
+        """Takes an idle instance, or reserves room for a new one, with the condition held.
+
+        Returns whether an instance was taken and which, or None when the pool is exhausted.
+        """
+        if self.idle:
+            self.hits += 1
+            return True, self.idle.pop()
+        if self.size < self.config.max_size:
+            self.size += 1
+            self.misses += 1
+            return False, None
+        return None
+
+    def __reserve(self, timeout: float | None = None) -> Tuple[bool, Any]:
+        with self.condition:
+            if (reserved := self.__take()) is not None:
+                return reserved
+            self.waits += 1
+            start = time.perf_counter()
+            try:
+                if not self.condition.wait_for(lambda: self.idle or self.size < self.config.max_size, timeout):
+                    raise SproingPoolTimeoutError(self.dependency_name, timeout)
+            finally:
+                self.wait_time += time.perf_counter() - start
+            return self.__take()
+
+    @staticmethod
+    def __wake(waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def __notify(self):
+        """Wakes a waiting thread and the longest waiting coroutine, with the condition held."""
+        self.condition.notify()
+        while self.waiters:
+            loop, waiter = self.waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(self.__wake, waiter)
+                return
+            except RuntimeError:
+                # Its event loop is closed, so nobody is waiting on it anymore.
+                continue
+
+    def __forget(self, loop: asyncio.AbstractEventLoop, waiter: asyncio.Future):
+        """Stops waiting, handing the wake-up over to the next coroutine if this one was already woken."""
+        with self.condition:
+            try:
+                self.waiters.remove((loop, waiter))
+            except ValueError:
+                self.__notify()
+
+    async def __reserve_async(self, timeout: float | None = None) -> Tuple[bool, Any]:
+        """Waits on the event loop for an instance, or room for a new one, without holding a thread."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        start = time.perf_counter()
+        try:
+            while True:
+                with self.condition:
+                    if (reserved := self.__take()) is not None:
+                        return reserved
+                    waiter = loop.create_future()
+                    self.waiters.append((loop, waiter))
+                try:
+                    await asyncio.wait_for(waiter, None if deadline is None else max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    self.__forget(loop, waiter)
+                    raise SproingPoolTimeoutError(self.dependency_name, timeout) from None
+                except asyncio.CancelledError:
+                    self.__forget(loop, waiter)
+                    raise
+        finally:
+            with self.condition:
+                self.wait_time += time.perf_counter() - start
+
+    def __discard(self):
+        with self.condition:
+            self.size -= 1
+            self.__notify()
+
+    def __create(self) -> Any:
+        try:
+            return self.build()
+        except BaseException:
+            self.__discard()
+            raise
+
+    async def __create_async(self) -> Any:
+        try:
+            instance = self.build()
+            return await instance if isawaitable(instance) else instance
+        except BaseException:
+            self.__discard()
+            raise
+
+    def acquire(self, timeout: float | None = None) -> Any:
+        taken, instance = self.__reserve(self.config.timeout if timeout is None else timeout)
+        return instance if taken else self.__create()
+
+    async def acquire_async(self, timeout: float | None = None) -> Any:
+        with self.condition:
+            reserved = self.__take()
+            if reserved is None:
+                self.waits += 1
+        if reserved is None:
+            reserved = await self.__reserve_async(self.config.timeout if timeout is None else timeout)
+        taken, instance = reserved
+        return instance if taken else await self.__create_async()
+
+    def release(self, instance: Any):
+        if self.config.reset:
+            try:
+                self.config.reset(instance)
+            except Exception:
+                self.__discard()
+                return
+        with self.condition:
+            self.idle.append(instance)
+            self.__notify()
+
+    def fill(self):
+        """Builds instances until min_idle of them are idle, without going over max_size."""
+        while True:
+            with self.condition:
+                if len(self.idle) >= self.config.min_idle or self.size >= self.config.max_size:
+                    return
+                self.size += 1
+            instance = self.__create()
+            with self.condition:
+                self.idle.append(instance)
+                self.__notify()
+
+    def after_fork(self):
+        """Forgets the instances in use by the parent's threads, which the child process will never release."""
+        self.condition = threading.Condition()
+        self.waiters = deque()
+        self.size = len(self.idle)
+
+    def stats(self) -> SproingPoolStats:
+        with self.condition:
+            return SproingPoolStats(self.hits, self.misses, self.waits, self.wait_time, self.size, len(self.idle))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Callable, Any
+
+UNRESOLVED = object()
+
+
+class SproingLazyProxy:
+    """Stands in for an injected dependency and only builds it on first use.
+
+    Attribute access, calls and the common protocols are forwarded to the dependency once it is built.
+    """
+
+    __slots__ = ("__resolve", "__target")
+
+    def __init__(self, resolve: Callable[[], Any]):
+        object.__setattr__(self, "_SproingLazyProxy__resolve", resolve)
+        object.__setattr__(self, "_SproingLazyProxy__target", UNRESOLVED)
+
+    def __get_target(self) -> Any:
+        target = self.__target
+        if target is UNRESOLVED:
+            target = self.__resolve()
+            object.__setattr__(self, "_SproingLazyProxy__target", target)
+        return target
+
+    @property
+    def __class__(self):
+        return type(self.__get_target())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__get_target(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.__get_target(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self.__get_target(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.__get_target()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return repr(self.__get_target())
+
+    def __str__(self) -> str:
+        return str(self.__get_target())
+
+    def __bool__(self) -> bool:
+        return bool(self.__get_target())
+
+    def __eq__(self, other: Any) -> bool:
+        return self.__get_target() == other
+
+    def __hash__(self) -> int:
+        return hash(self.__get_target())
+
+    def __len__(self) -> int:
+        return len(self.__get_target())
+
+    def __iter__(self):
+        return iter(self.__get_target())
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self.__get_target()
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.__get_target()[key]
+
+    def __setitem__(self, key: Any, value: Any):
+        self.__get_target()[key] = value
+
+    def __delitem__(self, key: Any):
+        del self.__get_target()[key]
+
+    def __enter__(self) -> Any:
+        return self.__get_target().__enter__()
+
+    def __exit__(self, *exc_info) -> Any:
+        return self.__get_target().__exit__(*exc_info)
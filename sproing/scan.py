@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import ast
+import importlib
+import importlib.util
+import os
+import threading
+from typing import Callable, Dict, List, Set, Tuple, Any
+
+from sproing.container import Container, default_container
+from sproing.manifest import SCAN_SECTION, source_hash, read_manifest_file, write_manifest_file
+
+# Entries of a module in the index: the names of the types it provides and the names of its named dependencies.
+MODULE_ENTRY_TYPE = Dict[str, Any]
+
+
+class SproingScanError(Exception):
+    def __init__(self, package: str, error: str):
+        super().__init__(f"Error scanning package '{package}': {error}")
+        self.package = package
+        self.error = error
+
+
+class SproingScanIndex:
+    """Maps the names of the types and named dependencies provided by scanned modules to those modules.
+
+    A module is only imported, registering its providers, the first time one of its entries is looked up.
+    """
+
+    def __init__(self):
+        self.types: Dict[str, Set[str]] = {}
+        self.names: Dict[str, Set[str]] = {}
+        self.lock = threading.Lock()
+
+    def add(self, module: str, entry: MODULE_ENTRY_TYPE):
+        for type_name in entry["types"]:
+            self.types.setdefault(type_name, set()).add(module)
+        for name in entry["names"]:
+            self.names.setdefault(name, set()).add(module)
+
+    def __load(self, select: Callable[[], Set[str]]) -> bool:
+        with self.lock:
+            modules = select()
+        if not modules:
+            return False
+        for module in sorted(modules):
+            importlib.import_module(module)
+        # Entries are only dropped once their modules are imported, so a concurrent lookup of the same key imports
+        # them too, waiting for the first import to finish instead of missing before the providers are registered.
+        with self.lock:
+            for entries in (self.types, self.names):
+                for key in [key for key, pending in entries.items() if pending & modules]:
+                    entries[key] -= modules
+                    if not entries[key]:
+                        del entries[key]
+        return True
+
+    def load_type(self, type_name: str) -> bool:
+        """Imports the modules providing the type. Returns whether any was imported."""
+        return self.__load(lambda: set(self.types.get(type_name, ())))
+
+    def load_name(self, name: str) -> bool:
+        return self.__load(lambda: set(self.names.get(name, ())))
+
+    def load_all(self) -> bool:
+        return self.__load(lambda: set().union(*self.types.values(), *self.names.values()))
+
+
+def __get_annotation_name(annotation: ast.expr | None) -> str | None:
+    """Returns the name of the class an annotation refers to, without the modules it is accessed through."""
+    if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+        try:
+            annotation = ast.parse(annotation.value, mode="eval").body
+        except SyntaxError:
+            return None
+    if isinstance(annotation, ast.Name):
+        return annotation.id
+    if isinstance(annotation, ast.Attribute):
+        return annotation.attr
+    return None
+
+
+def __is_dependency(function: ast.expr) -> bool:
+    return (isinstance(function, ast.Name) and function.id == "dependency") or \
+        (isinstance(function, ast.Attribute) and function.attr == "dependency")
+
+
+def __is_registration(node: ast.AST) -> bool:
+    return isinstance(node, ast.Call) and bool(node.args) and __is_dependency(node.func)
+
+
+def __get_bases(name: str, classes: Dict[str, List[str]]) -> Set[str]:
+    bases = set()
+    pending = list(classes.get(name, ()))
+    while pending:
+        base = pending.pop()
+        if base not in bases:
+            bases.add(base)
+            pending.extend(classes.get(base, ()))
+    return bases
+
+
+def read_module_entry(source: bytes) -> MODULE_ENTRY_TYPE:
+    """Reads the types and names a module registers from its source, without importing it.
+
+    Providers are found from the module's calls to dependency() and the functions and classes it decorates, and their
+    types from the return annotation of provider functions, or the name of provider classes.
+    """
+    tree = ast.parse(source)
+    returns = {}
+    types = set()
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            returns[node.name] = __get_annotation_name(node.returns)
+        elif isinstance(node, ast.ClassDef):
+            returns[node.name] = node.name
+        else:
+            continue
+        if any(map(__is_dependency, node.decorator_list)) and returns[node.name]:
+            types.add(returns[node.name])
+
+    for node in ast.walk(tree):
+        if not __is_registration(node):
+            continue
+        provider = __get_annotation_name(node.args[0])
+        if type_name := returns.get(provider):
+            types.add(type_name)
+        for keyword in node.keywords:
+            if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                names.add(keyword.value.value)
+    return {"types": types, "names": names}
+
+
+def __read_classes(source: bytes) -> Dict[str, List[str]]:
+    classes = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.ClassDef):
+            classes[node.name] = [base for base in map(__get_annotation_name, node.bases) if base]
+    return classes
+
+
+def find_modules(package: str) -> Dict[str, str]:
+    """Maps the names of the modules of a package to their source files, importing only the package's parents."""
+    spec = importlib.util.find_spec(package)
+    if spec is None or spec.origin is None:
+        raise SproingScanError(package, "package not found.")
+    if not spec.submodule_search_locations:
+        return {package: spec.origin}
+
+    modules = {}
+    for location in spec.submodule_search_locations:
+        for directory, subdirectories, files in os.walk(location):
+            subdirectories[:] = sorted(subdirectory for subdirectory in subdirectories
+                                       if os.path.isfile(os.path.join(directory, subdirectory, "__init__.py")))
+            parts = os.path.relpath(directory, location).split(os.sep)
+            prefix = ".".join([package, *(part for part in parts if part != ".")])
+            for file in sorted(files):
+                if not file.endswith(".py"):
+                    continue
+                module = prefix if file == "__init__.py" else f"{prefix}.{file[:-3]}"
+                modules[module] = os.path.join(directory, file)
+    return modules
+
+
+def __read_sources(modules: Dict[str, str]) -> Dict[str, bytes]:
+    sources = {}
+    for module, path in modules.items():
+        with open(path, "rb") as file:
+            sources[module] = file.read()
+    return sources
+
+
+def __build_entries(sources: Dict[str, bytes], manifest: Dict[str, Dict[str, Any]]
+                    ) -> Tuple[Dict[str, MODULE_ENTRY_TYPE], bool]:
+    """Reads the entry of every module, reusing the ones of the manifest whose source did not change.
+
+    The bases of provided classes defined anywhere in the package are indexed too, so supertypes can be resolved.
+    """
+    hashes = {module: source_hash(source) for module, source in sources.items()}
+    entries = {}
+    stale = [module for module in sources
+             if manifest.get(module, {}).get("hash") != hashes[module] or "index" not in manifest[module]]
+    classes = {}
+    if stale:
+        for source in sources.values():
+            classes.update(__read_classes(source))
+    for module, source in sources.items():
+        if module in stale:
+            entry = read_module_entry(source)
+            for type_name in list(entry["types"]):
+                entry["types"] |= __get_bases(type_name, classes)
+            manifest[module] = {"hash": hashes[module],
+                                "index": {"types": sorted(entry["types"]), "names": sorted(entry["names"])}}
+        entries[module] = manifest[module]["index"]
+    return entries, bool(stale)
+
+
+def scan(package: str, container: Container | None = None, manifest: str | None = None) -> SproingScanIndex:
+    """Indexes the providers of a package without importing its modules.
+
+    Each module is imported the first time one of the types or names it provides is looked up in the container.
+    Since importing registers the module's providers, it should register them into that same container. With a
+    manifest path, the index of unchanged modules is read from that file, and rewritten when a module changed.
+    """
+    container = default_container if container is None else container
+    modules = find_modules(package)
+    # The index is kept in its own section, so the file can also be the manifest given to use_manifest().
+    sections = read_manifest_file(manifest)
+    cached = sections.setdefault(SCAN_SECTION, {})
+    entries, changed = __build_entries(__read_sources(modules), cached)
+    if manifest is not None and changed:
+        write_manifest_file(manifest, sections)
+
+    index = SproingScanIndex()
+    for module, entry in entries.items():
+        index.add(module, entry)
+    container.add_index(index)
+    return index
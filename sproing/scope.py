@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from contextvars import ContextVar, Token
+from typing import Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sproing.dependency import SproingDependency
+
+REQUEST = "request"
+SCOPES = (REQUEST,)
+
+SCOPE_INSTANCES_TYPE = Dict["SproingDependency", Any]
+
+current_scope: ContextVar[SCOPE_INSTANCES_TYPE | None] = ContextVar("sproing_scope", default=None)
+
+
+class SproingScopeError(Exception):
+    def __init__(self, dependency_name: str, scope_name: str):
+        super().__init__(f"Dependency '{dependency_name}' has {scope_name} scope, but no scope is active.")
+        self.dependency_name = dependency_name
+        self.scope_name = scope_name
+
+
+class SproingScope:
+    """Caches the instances of scoped dependencies from entering the scope until leaving it.
+
+    The active scope is kept in a context variable, so every thread and every asyncio task sees its own scope.
+    Tasks created inside a scope share it with their parent.
+    """
+
+    def __init__(self):
+        self.instances: SCOPE_INSTANCES_TYPE = {}
+        self.token: Token | None = None
+
+    def __enter__(self) -> SproingScope:
+        self.token = current_scope.set(self.instances)
+        return self
+
+    def __exit__(self, *_):
+        current_scope.reset(self.token)
+        self.token = None
+        self.instances.clear()
+
+    async def __aenter__(self) -> SproingScope:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+
+def scope() -> SproingScope:
+    return SproingScope()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Any, Dict, List, Tuple
+
+from sproing import container
+
+
+class SproingTraceEvent:
+    """One provider construction: when it started and ended, on which thread, and inside which construction."""
+
+    __slots__ = ("name", "start", "end", "thread_id", "parent")
+
+    def __init__(self, name: str, start: int, thread_id: int, parent: int | None):
+        self.name = name
+        self.start = start
+        self.end: int | None = None
+        self.thread_id = thread_id
+        self.parent = parent
+
+
+class SproingTrace:
+    """Records the tree of provider constructions made while tracing is enabled.
+
+    Timestamps are nanoseconds relative to the start of the trace.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.events: List[SproingTraceEvent] = []
+        self.lock = threading.Lock()
+
+    def begin(self, name: str, parent: int | None) -> int:
+        event = SproingTraceEvent(name, time.perf_counter_ns() - self.origin, threading.get_ident(), parent)
+        with self.lock:
+            self.events.append(event)
+            return len(self.events) - 1
+
+    def end(self, index: int):
+        self.events[index].end = time.perf_counter_ns() - self.origin
+
+    def __finished(self) -> List[Tuple[int, SproingTraceEvent]]:
+        with self.lock:
+            return [(index, event) for index, event in enumerate(self.events) if event.end is not None]
+
+    def __stack(self, index: int) -> Tuple[str, ...]:
+        stack = []
+        while index is not None:
+            event = self.events[index]
+            stack.append(event.name)
+            index = event.parent
+        return tuple(reversed(stack))
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Exports the trace in the Chrome trace-event format, loadable in chrome://tracing or Perfetto."""
+        pid = os.getpid()
+        events = [{"name": event.name, "cat": "sproing", "ph": "X", "pid": pid, "tid": event.thread_id,
+                   "ts": event.start / 1000, "dur": (event.end - event.start) / 1000,
+                   "args": {"stack": ";".join(self.__stack(index))}}
+                  for index, event in self.__finished()]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+    def to_collapsed_stacks(self) -> str:
+        """Exports the self time of every construction stack in microseconds, in the collapsed format of flame
+        graph tools: one "outer;inner value" line per stack.
+        """
+        finished = self.__finished()
+        self_times = {index: event.end - event.start for index, event in finished}
+        for index, event in finished:
+            if event.parent in self_times:
+                self_times[event.parent] -= event.end - event.start
+
+        stacks: Dict[Tuple[str, ...], int] = {}
+        for index, self_time in self_times.items():
+            stack = self.__stack(index)
+            stacks[stack] = stacks.get(stack, 0) + max(self_time, 0)
+        return "\n".join(f"{';'.join(stack)} {round(self_time / 1000)}" for stack, self_time in stacks.items())
+
+
+current_trace: SproingTrace | None = None
+current_event: ContextVar[int | None] = ContextVar("sproing_trace_event", default=None)
+
+
+def trace_build(dependency_name: str, build: Callable[[], Any], is_async: bool,
+                trace: SproingTrace) -> Callable[[], Any]:
+    if is_async:
+        async def traced_build_async() -> Any:
+            index = trace.begin(dependency_name, current_event.get())
+            token = current_event.set(index)
+            try:
+                return await build()
+            finally:
+                current_event.reset(token)
+                trace.end(index)
+
+        return traced_build_async
+
+    def traced_build() -> Any:
+        index = trace.begin(dependency_name, current_event.get())
+        token = current_event.set(index)
+        try:
+            return build()
+        finally:
+            current_event.reset(token)
+            trace.end(index)
+
+    return traced_build
+
+
+def start_tracing() -> SproingTrace:
+    """Starts recording every provider construction made through the container into a new trace."""
+    global current_trace
+    current_trace = SproingTrace()
+    container.install_strategies()
+    return current_trace
+
+
+def stop_tracing() -> SproingTrace | None:
+    global current_trace
+    trace, current_trace = current_trace, None
+    container.install_strategies()
+    return trace
@@ -0,0 +1,215 @@
+import threading
+import time
+from contextvars import ContextVar
+
+import pytest
+
+from sproing import dependency, inject
+from sproing.cache import cached, SproingCacheDefinitionError
+
+
+class Token:
+    def __init__(self, version: int):
+        self.version = version
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_cached_dependency_reused(initialize):
+    built = 0
+
+    def token() -> Token:
+        nonlocal built
+        built += 1
+        return Token(built)
+
+    sproing_dependency = dependency(token, cache=cached(ttl=60))
+
+    @inject()
+    def handler(token: Token) -> Token:
+        return token
+
+    assert handler() is handler()
+    assert built == 1
+
+    stats = sproing_dependency.cache.stats()
+    assert (stats.hits, stats.misses, stats.refreshes, stats.size) == (1, 1, 0, 1)
+
+
+def test_cached_dependency_refreshed_in_background(initialize):
+    built = 0
+    release = threading.Event()
+
+    def token() -> Token:
+        nonlocal built
+        built += 1
+        if built > 1:
+            release.wait(5)
+        return Token(built)
+
+    sproing_dependency = dependency(token, cache=cached(ttl=0.01, max_stale=60))
+
+    assert sproing_dependency().version == 1
+    time.sleep(0.02)
+
+    # Expired values are served while a single refresh runs.
+    assert sproing_dependency().version == 1
+    assert sproing_dependency().version == 1
+    release.set()
+    wait_for(lambda: sproing_dependency.cache.stats().refreshes == 1)
+
+    assert sproing_dependency().version == 2
+    assert built == 2
+
+
+def test_cached_dependency_rebuilt_past_max_stale(initialize):
+    built = 0
+
+    def token() -> Token:
+        nonlocal built
+        built += 1
+        return Token(built)
+
+    sproing_dependency = dependency(token, cache=cached(ttl=0.01, max_stale=0.01))
+
+    assert sproing_dependency().version == 1
+    time.sleep(0.03)
+
+    assert sproing_dependency().version == 2
+    assert sproing_dependency.cache.stats().refreshes == 0
+
+
+def test_cached_dependency_rebuilt_after_failed_refresh(initialize):
+    built = 0
+
+    def token() -> Token:
+        nonlocal built
+        built += 1
+        if built == 2:
+            raise RuntimeError("refresh failed")
+        return Token(built)
+
+    sproing_dependency = dependency(token, cache=cached(ttl=0.01, max_stale=60))
+
+    assert sproing_dependency().version == 1
+    time.sleep(0.02)
+    assert sproing_dependency().version == 1
+    wait_for(lambda: sproing_dependency.cache.stats().size == 0)
+
+    assert sproing_dependency().version == 3
+
+
+def test_cached_dependency_refreshed_in_caller_context(initialize):
+    tenant = ContextVar("tenant", default=None)
+    versions = iter(range(100))
+
+    def token() -> Token:
+        assert tenant.get() == "acme"
+        return Token(next(versions))
+
+    sproing_dependency = dependency(token, cache=cached(ttl=0.01, max_stale=60))
+
+    tenant.set("acme")
+    assert sproing_dependency().version == 0
+    time.sleep(0.02)
+    assert sproing_dependency().version == 0
+    wait_for(lambda: sproing_dependency.cache.stats().refreshes == 1)
+
+    assert sproing_dependency().version == 1
+
+
+def test_cached_dependency_single_build(initialize):
+    built = 0
+    started = threading.Event()
+    release = threading.Event()
+
+    def token() -> Token:
+        nonlocal built
+        built += 1
+        started.set()
+        release.wait(5)
+        return Token(built)
+
+    sproing_dependency = dependency(token, cache=cached(ttl=60))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sproing_dependency())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert built == 1
+    assert len({id(result) for result in results}) == 1
+
+
+def test_cached_dependency_per_singleton_arguments(initialize):
+    versions = iter(range(100))
+
+    def version() -> int:
+        return next(versions)
+
+    def token(version: int) -> Token:
+        return Token(version)
+
+    version_dependency = dependency(version, singleton=True)
+    sproing_dependency = dependency(token, cache=cached(ttl=60, maxsize=2))
+
+    assert sproing_dependency().version == 0
+    version_dependency.value = 7
+    assert sproing_dependency().version == 7
+    assert sproing_dependency().version == 7
+    assert sproing_dependency.cache.stats().size == 2
+
+
+def test_cached_dependency_factory_argument(initialize):
+    clients = 0
+
+    class Client:
+        pass
+
+    def client() -> Client:
+        nonlocal clients
+        clients += 1
+        return Client()
+
+    def token(client: Client) -> Token:
+        return Token(clients)
+
+    dependency(client)
+    sproing_dependency = dependency(token, cache=cached(ttl=60))
+
+    assert {id(sproing_dependency()) for _ in range(5)} == {id(sproing_dependency())}
+    assert clients == 1
+    stats = sproing_dependency.cache.stats()
+    assert (stats.hits, stats.misses) == (5, 1)
+
+
+def test_cached_dependency_unhashable_argument(initialize):
+    def settings() -> dict:
+        return {"audience": "api"}
+
+    def token(settings: dict) -> Token:
+        return Token(len(settings))
+
+    dependency(settings, singleton=True)
+    sproing_dependency = dependency(token, cache=cached(ttl=60))
+
+    assert sproing_dependency() is sproing_dependency()
+
+
+def test_cached_dependency_must_be_factory(initialize):
+    def token() -> Token:
+        return Token(1)
+
+    with pytest.raises(SproingCacheDefinitionError):
+        dependency(token, singleton=True, cache=cached(ttl=60))
+    with pytest.raises(SproingCacheDefinitionError):
+        dependency(token, cache=cached(ttl=0))
@@ -0,0 +1,551 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Protocol, runtime_checkable
+
+import pytest
+
+from sproing import container, dependency, inject
+from sproing.container import (warm_up, SproingWarmUpError, Container, All, NoSuchSproingDependency,
+                               NoSuchNamedSproingDependency, SproingSealedContainerError,
+                               SproingCircularDependencyError, SproingAmbiguousDependencyError)
+
+
+def test_eager_singleton_built_on_warm_up(initialize):
+    calls = 0
+
+    def sample_dependency() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    sproing_dependency = dependency(sample_dependency, singleton=True, lazy=False)
+
+    assert calls == 0
+    timings = warm_up()
+
+    assert calls == 1
+    assert sproing_dependency() == 1
+    assert set(timings) == {sproing_dependency}
+
+
+def test_warm_up_skips_lazy_singletons(initialize):
+    def sample_dependency() -> int:
+        return 1
+
+    sproing_dependency = dependency(sample_dependency, singleton=True, lazy=True)
+
+    assert warm_up() == {}
+    assert not sproing_dependency.initialized
+
+
+def test_warm_up_builds_independent_singletons_concurrently(initialize):
+    def first() -> int:
+        time.sleep(0.1)
+        return 1
+
+    dependency(first, singleton=True, lazy=False)
+
+    def second() -> str:
+        time.sleep(0.1)
+        return "2"
+
+    dependency(second, singleton=True, lazy=False)
+
+    start = time.perf_counter()
+    warm_up(max_workers=2)
+
+    assert time.perf_counter() - start < 0.19
+
+
+def test_warm_up_follows_dependency_order(initialize):
+    built = []
+
+    def url() -> str:
+        time.sleep(0.05)
+        built.append("url")
+        return "db://"
+
+    dependency(url, singleton=True, lazy=False)
+
+    def port(url: str) -> int:
+        built.append("port")
+        return len(url)
+
+    dependency(port)
+
+    def address(port: int) -> bytes:
+        built.append("address")
+        return str(port).encode()
+
+    dependency(address, singleton=True, lazy=False)
+
+    timings = warm_up(max_workers=4)
+
+    assert built == ["url", "port", "address"]
+    assert [dependency.name for dependency in timings] == ["url", "address"]
+
+
+def test_warm_up_timings_by_dependency(initialize):
+    def make_provider(value: int):
+        def prov() -> int:
+            return value
+
+        return prov
+
+    registered = [dependency(make_provider(value), singleton=True, lazy=False) for value in range(3)]
+
+    assert set(warm_up()) == set(registered)
+
+
+def test_warm_up_fails_fast(initialize):
+    def broken() -> int:
+        raise ValueError("boom")
+
+    dependency(broken, singleton=True, lazy=False)
+
+    built = False
+
+    def dependent(value: int) -> str:
+        nonlocal built
+        built = True
+        return str(value)
+
+    dependency(dependent, singleton=True, lazy=False)
+
+    with pytest.raises(SproingWarmUpError) as excinfo:
+        warm_up()
+
+    assert excinfo.value.dependency_name == "broken"
+    assert not built
+
+
+def test_container_is_isolated(initialize):
+    isolated = Container()
+
+    def sample_dependency() -> str:
+        return "isolated"
+
+    dependency(sample_dependency, container=isolated)
+
+    assert isolated.get_dependency(str)[0]() == "isolated"
+    with pytest.raises(NoSuchSproingDependency):
+        Container().get_dependency(str)
+
+
+def test_child_container_shadows_parent(initialize):
+    parent = Container()
+
+    def parent_dependency() -> str:
+        return "parent"
+
+    def child_dependency() -> str:
+        return "child"
+
+    dependency(parent_dependency, primary=True, container=parent)
+    child = parent.child()
+    dependency(child_dependency, primary=True, container=child)
+
+    assert child.get_dependency(str)[0]() == "child"
+    assert parent.get_dependency(str)[0]() == "parent"
+
+
+def test_child_container_shadows_parent_without_primary(initialize):
+    parent = Container()
+    child = parent.child()
+
+    def a() -> str:
+        return "parent"
+
+    def b() -> str:
+        return "child"
+
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    def memory() -> MemoryStorage:
+        return MemoryStorage()
+
+    dependency(a, primary=True, container=parent)
+    dependency(b, container=child)
+    dependency(disk, container=parent)
+    memory_dependency = dependency(memory, container=child)
+
+    @inject(container=child)
+    def sample(value: str) -> str:
+        return value
+
+    assert child.get_dependency(str)[0]() == "child"
+    assert sample() == "child"
+    assert child.get_dependency(Storage) == (memory_dependency,)
+    assert parent.get_dependency(str)[0]() == "parent"
+    assert [d() for d in child.get_dependency(All[str])] == ["parent", "child"]
+
+
+def test_child_container_copies_on_write(initialize):
+    parent = Container()
+
+    def first() -> str:
+        return "first"
+
+    def second() -> str:
+        return "second"
+
+    def number() -> int:
+        return 1
+
+    dependency(first, container=parent)
+    dependency(number, name="number", container=parent)
+    child = parent.child()
+
+    assert child.dependencies == {}
+    assert child.get_named_dependency("number")() == 1
+
+    dependency(second, container=child)
+
+    assert [d() for d in child.get_dependency(All[str])] == ["first", "second"]
+    assert [d() for d in parent.get_dependency(All[str])] == ["first"]
+
+
+def test_child_container_sees_later_parent_registrations_of_its_types(initialize):
+    parent = Container()
+    child = parent.child()
+
+    def a() -> str:
+        return "a"
+
+    def b() -> str:
+        return "b"
+
+    def cc() -> str:
+        return "cc"
+
+    dependency(a, container=parent)
+    dependency(b, container=child)
+    dependency(cc, container=parent)
+
+    assert [d() for d in child.get_dependency(All[str])] == ["a", "cc", "b"]
+    assert [d() for d in parent.get_dependency(All[str])] == ["a", "cc"]
+    assert child.dependencies[str] == [child.get_dependency(All[str])[2]]
+
+
+def test_child_container_sees_parent_registrations(initialize):
+    parent = Container()
+    child = parent.child()
+
+    @inject(container=child)
+    def sample(value: str) -> str:
+        return value
+
+    def sample_dependency() -> str:
+        return "late"
+
+    dependency(sample_dependency, container=parent)
+
+    assert sample() == "late"
+
+
+def test_inject_from_child_container(initialize):
+    def parent_dependency() -> str:
+        return "parent"
+
+    def child_dependency() -> str:
+        return "child"
+
+    dependency(parent_dependency, primary=True)
+    child = Container().child()
+    dependency(child_dependency, container=child)
+
+    @inject(container=child)
+    def sample(value: str) -> str:
+        return value
+
+    @inject()
+    def default(value: str) -> str:
+        return value
+
+    assert sample() == "child"
+    assert default() == "parent"
+
+
+def test_sealed_container_lookups(initialize):
+    sealed = Container()
+
+    def first() -> str:
+        return "first"
+
+    def second() -> str:
+        return "second"
+
+    def number() -> int:
+        return 1
+
+    first_dependency = dependency(first, container=sealed)
+    second_dependency = dependency(second, primary=True, container=sealed)
+    number_dependency = dependency(number, name="number", container=sealed)
+    sealed.seal()
+
+    assert sealed.sealed
+    assert sealed.get_dependency(str) == (second_dependency,)
+    assert sealed.get_dependency(All[str]) == (first_dependency, second_dependency)
+    assert sealed.get_named_dependency("number") is number_dependency
+    with pytest.raises(NoSuchSproingDependency):
+        sealed.get_dependency(float)
+    with pytest.raises(NoSuchNamedSproingDependency):
+        sealed.get_named_dependency("missing")
+
+
+def test_sealed_container_rejects_registration(initialize):
+    sealed = Container()
+    sealed.seal()
+
+    def sample_dependency() -> str:
+        return "late"
+
+    with pytest.raises(SproingSealedContainerError):
+        dependency(sample_dependency, container=sealed)
+
+
+def test_seal_validates_graph(initialize):
+    invalid = Container()
+
+    def sample_dependency(value: int) -> str:
+        return str(value)
+
+    dependency(sample_dependency, container=invalid)
+
+    with pytest.raises(NoSuchSproingDependency):
+        invalid.seal()
+    assert not invalid.sealed
+
+
+def test_seal_detects_cycles(initialize):
+    cyclic = Container()
+
+    def text(value: int) -> str:
+        return str(value)
+
+    def number(value: str) -> int:
+        return int(value)
+
+    dependency(text, container=cyclic)
+    dependency(number, container=cyclic)
+
+    with pytest.raises(SproingCircularDependencyError):
+        cyclic.seal()
+
+
+def test_seal_requires_sealed_parent(initialize):
+    parent = Container()
+    with pytest.raises(SproingSealedContainerError):
+        parent.child().seal()
+
+    parent.seal()
+    child = parent.child()
+
+    def sample_dependency() -> str:
+        return "child"
+
+    dependency(sample_dependency, container=child)
+    child.seal()
+
+    assert child.get_dependency(str)[0]() == "child"
+
+
+def test_inject_from_sealed_container(initialize):
+    sealed = Container()
+
+    def sample_dependency() -> str:
+        return "sealed"
+
+    dependency(sample_dependency, container=sealed)
+
+    @inject(container=sealed)
+    def sample(value: str) -> str:
+        return value
+
+    assert sample() == "sealed"
+    sealed.seal()
+    assert sample() == "sealed"
+
+
+class Storage(ABC):
+    @abstractmethod
+    def read(self) -> str:
+        ...
+
+
+class DiskStorage(Storage):
+    def read(self) -> str:
+        return "disk"
+
+
+class MemoryStorage(Storage):
+    def read(self) -> str:
+        return "memory"
+
+
+@runtime_checkable
+class Reader(Protocol):
+    def read(self) -> str:
+        ...
+
+
+def test_resolve_by_supertype(initialize):
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    disk_dependency = dependency(disk)
+
+    assert container.get_dependency(Storage) == (disk_dependency,)
+    assert container.get_dependency(All[Storage]) == (disk_dependency,)
+
+
+def test_resolve_supertype_prefers_exact_type(initialize):
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    def storage() -> Storage:
+        return MemoryStorage()
+
+    disk_dependency = dependency(disk)
+    storage_dependency = dependency(storage)
+
+    assert container.get_dependency(Storage) == (storage_dependency,)
+    assert container.get_dependency(All[Storage]) == (storage_dependency, disk_dependency)
+
+
+def test_resolve_ambiguous_supertype(initialize):
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    def memory() -> MemoryStorage:
+        return MemoryStorage()
+
+    dependency(disk)
+    dependency(memory)
+
+    with pytest.raises(SproingAmbiguousDependencyError):
+        container.get_dependency(Storage)
+    assert len(container.get_dependency(All[Storage])) == 2
+
+
+def test_resolve_supertype_by_primary(initialize):
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    def memory() -> MemoryStorage:
+        return MemoryStorage()
+
+    dependency(disk)
+    memory_dependency = dependency(memory, primary=True)
+
+    @inject()
+    def read(storage: Storage) -> str:
+        return storage.read()
+
+    assert container.get_dependency(Storage) == (memory_dependency,)
+    assert read() == "memory"
+
+
+def test_resolve_by_protocol(initialize):
+    class Text:
+        def read(self) -> str:
+            return "text"
+
+    def text() -> Text:
+        return Text()
+
+    def number() -> int:
+        return 1
+
+    text_dependency = dependency(text)
+    dependency(number)
+
+    assert container.get_dependency(Reader) == (text_dependency,)
+
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    disk_dependency = dependency(disk)
+
+    assert container.get_dependency(All[Reader]) == (text_dependency, disk_dependency)
+
+
+def test_resolve_supertype_in_child_container(initialize):
+    parent = Container()
+
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    def memory() -> MemoryStorage:
+        return MemoryStorage()
+
+    disk_dependency = dependency(disk, container=parent)
+    child = parent.child()
+    memory_dependency = dependency(memory, container=child)
+
+    assert child.get_dependency(All[Storage]) == (disk_dependency, memory_dependency)
+    assert parent.get_dependency(Storage) == (disk_dependency,)
+
+
+def test_resolve_supertype_in_sealed_container(initialize):
+    sealed = Container()
+
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    disk_dependency = dependency(disk, container=sealed)
+    sealed.seal()
+
+    assert sealed.get_dependency(Storage) == (disk_dependency,)
+    assert sealed.table[Storage] == (disk_dependency,)
+
+
+def test_find_dependency_remembers_misses(initialize):
+    child = Container()
+
+    assert child.find_dependency(Storage) == ()
+    assert child.misses[Storage] == child.generation
+
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    disk_dependency = dependency(disk, container=child)
+
+    assert child.find_dependency(Storage) == (disk_dependency,)
+    with pytest.raises(NoSuchSproingDependency):
+        child.get_dependency(int)
+    assert child.find_dependency(int) == ()
+
+
+def test_protocol_provider_resolved_once(initialize):
+    def reader() -> Reader:
+        return DiskStorage()
+
+    reader_dependency = dependency(reader)
+
+    assert container.get_dependency(All[Reader]) == (reader_dependency,)
+
+
+def test_protocol_index_checks_only_new_registrations(initialize, monkeypatch):
+    def disk() -> DiskStorage:
+        return DiskStorage()
+
+    def memory() -> MemoryStorage:
+        return MemoryStorage()
+
+    disk_dependency = dependency(disk)
+    assert container.get_dependency(All[Reader]) == (disk_dependency,)
+
+    checked = []
+    implements_protocol = container.implements_protocol
+
+    def checking(return_type, protocol):
+        checked.append(return_type)
+        return implements_protocol(return_type, protocol)
+
+    monkeypatch.setattr(container, "implements_protocol", checking)
+    memory_dependency = dependency(memory)
+
+    assert container.get_dependency(All[Reader]) == (disk_dependency, memory_dependency)
+    assert checked == [MemoryStorage]
@@ -1,8 +1,15 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import pytest
 
 from sproing import container
 from sproing import dependency
-from sproing.container import SproingNamedDependencyError, SproingDependencyError
+from sproing.container import (SproingNamedDependencyError, SproingDependencyError, initialize_container, All,
+                               SproingCircularDependencyError)
 from sproing.dependency import SproingDependencyDefinitionError, SproingDependency, SproingLazyDependencyDefinitionError
 
 
@@ -155,3 +162,295 @@ def test_not_lazy_factory(initialize):
         expected = ("Error defining dependency 'sample_dependency' lazyness: "
                     "must be lazy when not singleton.")
         assert expected in excinfo.value
+
+
+def test_registration_changes_generation(initialize):
+    def sample_dependency() -> str:
+        ...
+
+    generation = container.generation
+    dependency(sample_dependency)
+
+    assert container.generation != generation
+
+
+def test_falsy_singleton_built_once(initialize):
+    calls = 0
+
+    def sample_dependency() -> dict:
+        nonlocal calls
+        calls += 1
+        return {}
+
+    sproing_dependency = dependency(sample_dependency, singleton=True)
+
+    assert sproing_dependency() == {}
+    assert sproing_dependency() is sproing_dependency()
+    assert calls == 1
+
+
+def test_singleton_built_once_across_threads(initialize):
+    calls = 0
+    start = threading.Barrier(32)
+
+    def sample_dependency() -> object:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return object()
+
+    sproing_dependency = dependency(sample_dependency, singleton=True)
+
+    def resolve(_):
+        start.wait()
+        return sproing_dependency()
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        values = list(executor.map(resolve, range(32)))
+
+    assert calls == 1
+    assert all(value is values[0] for value in values)
+
+
+def test_singleton_stress(initialize):
+    calls = 0
+
+    def sample_dependency() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.001)
+        return 0
+
+    for _ in range(20):
+        initialize_container()
+        calls = 0
+        sproing_dependency = dependency(sample_dependency, singleton=True)
+        start = threading.Barrier(16)
+
+        def resolve(_):
+            start.wait()
+            return [sproing_dependency() for _ in range(100)]
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(resolve, range(16)))
+
+        assert calls == 1
+        assert all(value == 0 for result in results for value in result)
+
+
+def test_async_singleton_dependency(initialize):
+    value = 0
+
+    async def sample_dependency() -> int:
+        nonlocal value
+        value += 1
+        return value
+
+    sproing_dependency = dependency(sample_dependency, singleton=True)
+
+    assert asyncio.run(sproing_dependency()) == 1
+    assert asyncio.run(sproing_dependency()) == 1
+
+
+def test_not_lazy_async_singleton(initialize):
+    async def sample_dependency() -> int:
+        ...
+
+    with pytest.raises(SproingLazyDependencyDefinitionError):
+        dependency(sample_dependency, singleton=True, lazy=False)
+
+
+def test_dependency_parameters_resolved(initialize):
+    class Settings:
+        def __init__(self, url: str):
+            self.url = url
+
+    class Client:
+        def __init__(self, settings: Settings):
+            self.settings = settings
+
+    def url() -> str:
+        return "db://"
+
+    dependency(url)
+
+    def settings(url: str) -> Settings:
+        return Settings(url)
+
+    dependency(settings, singleton=True)
+
+    def client(settings: Settings) -> Client:
+        return Client(settings)
+
+    client_dependency = dependency(client)
+
+    first, second = client_dependency(), client_dependency()
+    assert first is not second
+    assert first.settings is second.settings
+    assert first.settings.url == "db://"
+
+
+def test_dependency_all_parameter_resolved(initialize):
+    def first() -> str:
+        return "A"
+
+    dependency(first)
+
+    def second() -> str:
+        return "B"
+
+    dependency(second)
+
+    def joined(values: All[str]) -> int:
+        return len(values)
+
+    assert dependency(joined)() == 2
+
+
+def test_async_dependency_parameters_resolved(initialize):
+    async def url() -> str:
+        return "db://"
+
+    dependency(url)
+
+    def port() -> int:
+        return 5432
+
+    dependency(port)
+
+    async def address(url: str, port: int) -> bytes:
+        return f"{url}:{port}".encode()
+
+    assert asyncio.run(dependency(address)()) == b"db://:5432"
+
+
+def test_sync_dependency_with_async_parameter(initialize):
+    async def url() -> str:
+        return "db://"
+
+    dependency(url)
+
+    def address(url: str) -> bytes:
+        return url.encode()
+
+    with pytest.raises(SproingDependencyDefinitionError):
+        dependency(address)()
+
+
+def test_circular_dependency(initialize):
+    def first(value: int) -> str:
+        return str(value)
+
+    first_dependency = dependency(first)
+
+    def second(value: str) -> int:
+        return len(value)
+
+    dependency(second)
+
+    with pytest.raises(SproingCircularDependencyError) as excinfo:
+        first_dependency()
+
+    assert [dep.name for dep in excinfo.value.cycle] == ["first", "second", "first"]
+
+
+def test_resolving_does_not_build_the_dependency_graph(initialize):
+    def url() -> str:
+        return "db://"
+
+    def port(url: str) -> int:
+        return len(url)
+
+    def unrelated(value: float) -> bytes:
+        return b""
+
+    dependency(url)
+    port_dependency = dependency(port)
+    dependency(unrelated)
+
+    assert port_dependency() == 5
+    assert container.default_container.graph_cache[0] != container.generation
+    assert container.get_resolution_order([port_dependency])[-1] is port_dependency
+
+
+def test_resolution_order(initialize):
+    def url() -> str:
+        return "db://"
+
+    url_dependency = dependency(url)
+
+    def port(url: str) -> int:
+        return len(url)
+
+    port_dependency = dependency(port)
+
+    def address(url: str, port: int) -> bytes:
+        return f"{url}:{port}".encode()
+
+    address_dependency = dependency(address)
+
+    assert container.get_resolution_order() == (url_dependency, port_dependency, address_dependency)
+    assert container.get_dependency_graph()[address_dependency] == (url_dependency, port_dependency)
+
+
+def test_class_provider(initialize):
+    class Settings:
+        pass
+
+    class Service:
+        __slots__ = ("settings",)
+
+        def __init__(self, settings: Settings):
+            self.settings = settings
+
+    def settings() -> Settings:
+        return Settings()
+
+    dependency(settings, singleton=True)
+    service_dependency = dependency(Service)
+
+    assert service_dependency.return_type() is Service
+    assert container.get_dependency(Service) == (service_dependency,)
+    assert service_dependency().settings is container.get_dependency(Settings)[0]()
+
+
+def test_provider_optional_and_default_parameters(initialize):
+    class Settings:
+        pass
+
+    class Tracer:
+        pass
+
+    class Service:
+        def __init__(self, settings: Optional[Settings], tracer: Tracer | None, retries: int = 3, timeout=5):
+            self.settings = settings
+            self.tracer = tracer
+            self.retries = retries
+            self.timeout = timeout
+
+    def settings() -> Settings:
+        return Settings()
+
+    settings_dependency = dependency(settings, singleton=True)
+    service_dependency = dependency(Service)
+    service = service_dependency()
+
+    assert service.settings is settings_dependency()
+    assert (service.tracer, service.retries, service.timeout) == (None, 3, 5)
+    assert container.get_resolution_order([service_dependency]) == (settings_dependency, service_dependency)
+
+    def retries() -> int:
+        return 5
+
+    dependency(retries)
+
+    assert service_dependency().retries == 5
+
+
+def test_class_provider_requires_hints(initialize):
+    class Service:
+        def __init__(self, settings):
+            self.settings = settings
+
+    with pytest.raises(SproingDependencyDefinitionError):
+        dependency(Service)
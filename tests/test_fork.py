@@ -0,0 +1,134 @@
+import os
+import pickle
+
+import pytest
+
+from sproing import dependency, inject
+from sproing.container import Container
+from sproing.fork import prefork_warm_up, SproingForkDefinitionError, SproingForkError
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+class Connection:
+    def __init__(self, owner: int):
+        self.owner = owner
+
+
+def in_child(fn):
+    """Runs fn in a forked child process and returns its result, or the exception it raised."""
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        try:
+            result = fn()
+        except Exception as e:
+            result = e
+        with os.fdopen(write, "wb") as file:
+            pickle.dump(result, file)
+        os._exit(0)
+    os.close(write)
+    with os.fdopen(read, "rb") as file:
+        result = pickle.load(file)
+    os.waitpid(pid, 0)
+    return result
+
+
+def connection() -> Connection:
+    return Connection(os.getpid())
+
+
+def test_reinit_singleton_rebuilt_in_child(initialize):
+    sproing_dependency = dependency(connection, singleton=True, fork="reinit")
+
+    @inject(compile=True)
+    def handler(connection: Connection) -> int:
+        return connection.owner
+
+    assert handler() == os.getpid()
+    child_owner, child_pid = in_child(lambda: (handler(), os.getpid()))
+
+    assert child_owner == child_pid
+    assert sproing_dependency().owner == os.getpid()
+
+
+def test_shared_singleton_kept_in_child(initialize):
+    dependency(connection, singleton=True, fork="share")
+
+    @inject()
+    def handler(connection: Connection) -> int:
+        return connection.owner
+
+    assert [built.name for built in prefork_warm_up(freeze=False)] == ["connection"]
+    assert in_child(handler) == os.getpid()
+
+
+def test_forbidden_singleton_raises_in_child(initialize):
+    sproing_dependency = dependency(connection, singleton=True, fork="forbid")
+    sproing_dependency()
+
+    error = in_child(sproing_dependency)
+
+    assert isinstance(error, SproingForkError)
+    assert sproing_dependency().owner == os.getpid()
+
+
+def test_forbidden_singleton_built_in_child(initialize):
+    sproing_dependency = dependency(connection, singleton=True, fork="forbid")
+
+    assert in_child(lambda: sproing_dependency().owner) != os.getpid()
+
+
+def test_prefork_warm_up_skips_reinit(initialize):
+    class Settings:
+        pass
+
+    def settings() -> Settings:
+        return Settings()
+
+    dependency(settings, singleton=True, lazy=False)
+    reinit_dependency = dependency(connection, singleton=True, fork="reinit")
+
+    assert [built.name for built in prefork_warm_up(freeze=False)] == ["settings"]
+    assert not reinit_dependency.initialized
+
+
+def test_prefork_warm_up_of_container(initialize):
+    registry = Container()
+    shared_dependency = dependency(connection, singleton=True, fork="share", container=registry)
+    reinit_dependency = dependency(connection, singleton=True, fork="reinit")
+
+    assert list(prefork_warm_up(freeze=False, container=registry)) == [shared_dependency]
+    assert not reinit_dependency.initialized
+    assert in_child(lambda: shared_dependency().owner) == os.getpid()
+
+    class Client:
+        def __init__(self, connection: Connection):
+            self.connection = connection
+
+    invalid = Container()
+    dependency(connection, singleton=True, fork="reinit", container=invalid)
+    dependency(Client, singleton=True, fork="share", container=invalid)
+
+    with pytest.raises(SproingForkDefinitionError):
+        prefork_warm_up(freeze=False, container=invalid)
+
+
+def test_shared_singleton_cannot_depend_on_reinit(initialize):
+    class Client:
+        def __init__(self, connection: Connection):
+            self.connection = connection
+
+    dependency(connection, singleton=True, fork="reinit")
+    dependency(Client, singleton=True, fork="share")
+
+    with pytest.raises(SproingForkDefinitionError):
+        prefork_warm_up(freeze=False)
+
+
+def test_fork_policy_definition(initialize):
+    with pytest.raises(SproingForkDefinitionError):
+        dependency(connection, singleton=True, fork="copy")
+    with pytest.raises(SproingForkDefinitionError):
+        dependency(connection, fork="reinit")
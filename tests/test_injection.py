@@ -1,5 +1,15 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+import pytest
+
 from sproing import dependency, inject
-from sproing.container import All
+from sproing import container
+from sproing import injection
+from sproing.container import All, Container, NoSuchSproingDependency, LazyAll, ParallelAll
+from sproing.injection import SproingInjectionDefinitionError
 
 
 def test_inject(initialize):
@@ -138,4 +148,546 @@ def test_inject_all_of(initialize):
     def sample(arg: All[str]):
         return arg
 
-    assert sample() == ["A", "B"]
+    assert sample() == ("A", "B")
+
+
+def test_inject_reuses_plan(initialize, monkeypatch):
+    def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    @inject()
+    def sample(world: str) -> str:
+        return world
+
+    assert sample() == "world!"
+
+    def fail(_):
+        raise AssertionError("Dependency resolved again with an unchanged container.")
+
+    monkeypatch.setattr(container.default_container, "resolve_parameters", fail)
+    assert sample() == "world!"
+
+
+def test_inject_plan_invalidated_on_registration(initialize):
+    def sample_dependency() -> str:
+        return "Hello, "
+
+    dependency(sample_dependency)
+
+    @inject()
+    def sample(value: str) -> str:
+        return value
+
+    assert sample() == "Hello, "
+
+    def another_dependency() -> str:
+        return "world!"
+
+    dependency(another_dependency, primary=True)
+
+    assert sample() == "world!"
+
+
+def test_compiled_inject(initialize):
+    def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    def another_dependency() -> int:
+        return 2
+
+    dependency(another_dependency)
+
+    @inject(compile=True)
+    def sample(world: str, numba: int) -> str:
+        return f"Hello, {world} Numba: {numba}."
+
+    assert sample() == "Hello, world! Numba: 2."
+
+
+def test_compiled_inject_singleton_dependency(initialize):
+    value = 0
+
+    def sample_dependency() -> int:
+        nonlocal value
+        value += 1
+        return value
+
+    dependency(sample_dependency, singleton=True)
+
+    @inject(compile=True)
+    def sample(arg: int) -> int:
+        return arg
+
+    assert sample() == 1
+    assert sample() == 1
+
+
+def test_compiled_inject_non_singleton_dependency(initialize):
+    value = 0
+
+    def sample_dependency() -> int:
+        nonlocal value
+        value += 1
+        return value
+
+    dependency(sample_dependency)
+
+    @inject(compile=True)
+    def sample(arg: int) -> int:
+        return arg
+
+    assert sample() == 1
+    assert sample() == 2
+
+
+def test_compiled_inject_all_of_and_named(initialize):
+    def sample_dependency() -> str:
+        return "A"
+
+    dependency(sample_dependency, name="first_dependency")
+
+    def another_dependency() -> str:
+        return "B"
+
+    dependency(another_dependency)
+
+    @inject(explicit={"value": "first_dependency"}, compile=True)
+    def sample(value: str, arg: All[str]):
+        return value, arg
+
+    assert sample() == ("A", ("A", "B"))
+
+
+def test_compiled_inject_recompiled_on_registration(initialize):
+    def sample_dependency() -> str:
+        return "Hello, "
+
+    dependency(sample_dependency)
+
+    @inject(compile=True)
+    def sample(value: str) -> str:
+        return value
+
+    assert sample() == "Hello, "
+
+    def another_dependency() -> str:
+        return "world!"
+
+    dependency(another_dependency, primary=True)
+
+    assert sample() == "world!"
+    assert sample() == "world!"
+
+
+def test_inject_async_dependency(initialize):
+    async def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    @inject()
+    async def sample(world: str) -> str:
+        return f"Hello, {world}"
+
+    assert asyncio.run(sample()) == "Hello, world!"
+
+
+def test_inject_async_all_of(initialize):
+    async def sample_dependency() -> str:
+        return "A"
+
+    dependency(sample_dependency)
+
+    def another_dependency() -> str:
+        return "B"
+
+    dependency(another_dependency)
+
+    @inject()
+    async def sample(arg: All[str]):
+        return arg
+
+    assert asyncio.run(sample()) == ("A", "B")
+
+
+def test_inject_async_dependencies_concurrently(initialize):
+    class Cache:
+        pass
+
+    class Database:
+        pass
+
+    async def cache() -> Cache:
+        await asyncio.sleep(0.1)
+        return Cache()
+
+    dependency(cache)
+
+    async def database() -> Database:
+        await asyncio.sleep(0.1)
+        return Database()
+
+    dependency(database)
+
+    @inject()
+    async def sample(cache: Cache, database: Database) -> float:
+        return time.perf_counter()
+
+    start = time.perf_counter()
+    assert asyncio.run(sample()) - start < 0.19
+
+
+def test_inject_async_singleton_dependency(initialize):
+    value = 0
+
+    async def sample_dependency() -> int:
+        nonlocal value
+        await asyncio.sleep(0.01)
+        value += 1
+        return value
+
+    dependency(sample_dependency, singleton=True)
+
+    @inject()
+    async def sample(arg: int) -> int:
+        return arg
+
+    async def run():
+        return await asyncio.gather(*(sample() for _ in range(10)))
+
+    assert asyncio.run(run()) == [1] * 10
+
+
+def test_inject_async_dependency_into_sync_callable(initialize):
+    async def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    @inject()
+    def sample(world: str) -> str:
+        return world
+
+    with pytest.raises(SproingInjectionDefinitionError):
+        sample()
+
+
+def test_compiled_inject_async(initialize):
+    async def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    def another_dependency() -> int:
+        return 2
+
+    dependency(another_dependency, singleton=True)
+
+    @inject(compile=True)
+    async def sample(world: str, numba: int) -> str:
+        return f"Hello, {world} Numba: {numba}."
+
+    assert asyncio.run(sample()) == "Hello, world! Numba: 2."
+    assert asyncio.run(sample()) == "Hello, world! Numba: 2."
+
+
+def test_inject_validates_explicit_names_on_decoration(initialize):
+    def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency, name="sample_dependency")
+
+    with pytest.raises(SproingInjectionDefinitionError):
+        @inject(explicit={"missing": "sample_dependency"})
+        def sample(value: str) -> str:
+            return value
+
+
+def test_inject_validates_named_dependencies_on_decoration(initialize):
+    with pytest.raises(SproingInjectionDefinitionError):
+        @inject(explicit={"value": "missing_dependency"})
+        def sample(value: str) -> str:
+            return value
+
+
+def test_inject_deferred_named_dependencies(initialize):
+    deferred = Container()
+
+    @inject(explicit={"value": "late_dependency"}, container=deferred, defer=True)
+    def sample(value: str) -> str:
+        return value
+
+    def late_dependency() -> str:
+        return "late"
+
+    dependency(late_dependency, name="late_dependency", container=deferred)
+    deferred.seal()
+
+    assert sample() == "late"
+
+
+def test_inject_deferred_named_dependencies_checked_on_seal(initialize):
+    deferred = Container()
+
+    @inject(explicit={"value": "missing_dependency"}, container=deferred, defer=True)
+    def sample(value: str) -> str:
+        return value
+
+    with pytest.raises(SproingInjectionDefinitionError):
+        deferred.seal()
+
+
+def test_inject_does_not_introspect_on_call(initialize, monkeypatch):
+    def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    @inject()
+    def sample(value: str) -> str:
+        return value
+
+    def fail(_):
+        raise AssertionError("Type hints read again after decoration.")
+
+    monkeypatch.setattr(injection, "get_type_hints", fail)
+    assert sample() == "world!"
+    container.invalidate()
+    assert sample() == "world!"
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_caller_arguments_skip_resolution(initialize, compile):
+    calls = 0
+
+    def sample_dependency() -> str:
+        nonlocal calls
+        calls += 1
+        return "resolved"
+
+    def number_dependency() -> int:
+        return 1
+
+    dependency(sample_dependency)
+    dependency(number_dependency)
+
+    @inject(compile=compile)
+    def sample(value: str, number: int) -> str:
+        return f"{value}{number}"
+
+    assert sample("given") == "given1"
+    assert sample(value="given", number=2) == "given2"
+    assert sample(number=3, value="given") == "given3"
+    assert calls == 0
+
+    assert sample() == "resolved1"
+    assert sample(number=3) == "resolved3"
+    assert calls == 2
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_async_caller_arguments_skip_resolution(initialize, compile):
+    calls = 0
+
+    async def sample_dependency() -> str:
+        nonlocal calls
+        calls += 1
+        return "resolved"
+
+    dependency(sample_dependency)
+
+    @inject(compile=compile)
+    async def sample(request: int, value: str) -> str:
+        return f"{value}{request}"
+
+    assert asyncio.run(sample(1, "given")) == "given1"
+    assert calls == 0
+    assert asyncio.run(sample(2)) == "resolved2"
+    assert calls == 1
+
+
+def test_inject_unresolvable_argument_supplied_by_caller(initialize):
+    def sample_dependency() -> str:
+        return "resolved"
+
+    dependency(sample_dependency)
+
+    @inject()
+    def sample(request: int, value: str) -> str:
+        return f"{value}{request}"
+
+    assert sample(1) == "resolved1"
+    with pytest.raises(NoSuchSproingDependency):
+        sample()
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_class(initialize, compile):
+    def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    @inject(compile=compile)
+    class Sample:
+        __slots__ = ("value", "suffix")
+
+        def __init__(self, value: str, suffix: str = "?"):
+            self.value = value
+            self.suffix = suffix
+
+    sample = Sample()
+    assert sample.value == "world!"
+    assert isinstance(sample, Sample)
+    assert Sample("given").value == "given"
+    assert Sample(suffix="!").value == "world!"
+
+
+def test_inject_method(initialize):
+    def sample_dependency() -> str:
+        return "world!"
+
+    dependency(sample_dependency)
+
+    class Sample:
+        def __init__(self, greeting: str):
+            self.greeting = greeting
+
+        @inject()
+        def greet(self, value: str) -> str:
+            return f"{self.greeting}, {value}"
+
+    assert Sample("Hello").greet() == "Hello, world!"
+    assert Sample("Hello").greet("you") == "Hello, you"
+    assert Sample.greet.__name__ == "greet"
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_all_of_single_dependency(initialize, compile):
+    def sample_dependency() -> str:
+        return "A"
+
+    dependency(sample_dependency)
+
+    @inject(compile=compile)
+    def sample(values: All[str]) -> tuple:
+        return values
+
+    assert sample() == ("A",)
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_all_of_singletons_reuses_tuple(initialize, compile):
+    def first() -> str:
+        return "A"
+
+    def second() -> str:
+        return "B"
+
+    dependency(first, singleton=True)
+    dependency(second, singleton=True)
+
+    @inject(compile=compile)
+    def sample(values: All[str]) -> tuple:
+        return values
+
+    assert sample() == ("A", "B")
+    assert sample() is sample()
+
+
+def test_inject_lazy_all_of(initialize):
+    built = []
+
+    def first() -> str:
+        built.append("A")
+        return "A"
+
+    def second() -> str:
+        built.append("B")
+        return "B"
+
+    dependency(first)
+    dependency(second)
+
+    @inject()
+    def sample(values: LazyAll[str]) -> str:
+        return next(iter(values))
+
+    assert sample() == "A"
+    assert built == ["A"]
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_parallel_all_of(initialize, compile):
+    threads = set()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def first() -> str:
+        threads.add(threading.get_ident())
+        barrier.wait()
+        return "A"
+
+    def second() -> str:
+        threads.add(threading.get_ident())
+        barrier.wait()
+        return "B"
+
+    dependency(first)
+    dependency(second)
+
+    @inject(compile=compile)
+    def sample(values: ParallelAll[str]) -> tuple:
+        return values
+
+    assert sample() == ("A", "B")
+    assert len(threads) == 2
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_optional(initialize, compile):
+    class Integration:
+        pass
+
+    @inject(compile=compile)
+    def sample(integration: Optional[Integration], other: Integration | None, retries: int = 3) -> tuple:
+        return integration, other, retries
+
+    assert sample() == (None, None, 3)
+    assert sample(retries=1) == (None, None, 1)
+
+    def integration() -> Integration:
+        return Integration()
+
+    def retries() -> int:
+        return 5
+
+    dependency(integration, singleton=True)
+    dependency(retries)
+
+    value, other, retries = sample()
+    assert isinstance(value, Integration)
+    assert value is other
+    assert retries == 5
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_inject_optional_miss_not_looked_up_per_call(initialize, monkeypatch, compile):
+    class Integration:
+        pass
+
+    @inject(compile=compile)
+    def sample(integration: Optional[Integration] = None) -> Integration | None:
+        return integration
+
+    assert sample() is None
+
+    def fail(_):
+        raise AssertionError("Looked up again.")
+
+    monkeypatch.setattr(container.default_container, "find_dependency", fail)
+    monkeypatch.setattr(container.default_container, "get_dependency", fail)
+    assert sample() is None
@@ -0,0 +1,136 @@
+import importlib
+import json
+import sys
+import textwrap
+
+import pytest
+
+from sproing import injection, manifest
+from sproing.container import All, initialize_container
+from sproing.manifest import use_manifest, save_manifest, encode_type, decode_type
+from sproing.scan import scan
+
+SERVICES = """
+from sproing import dependency, inject
+from sproing.container import All
+
+
+class Settings:
+    pass
+
+
+class Service:
+    def __init__(self, settings: "Settings"):
+        self.settings = settings
+
+
+def settings() -> "Settings":
+    return Settings()
+
+
+dependency(settings, singleton=True)
+dependency(Service)
+
+
+@inject()
+def handler(service: Service, services: All[Service], value=None):
+    return service, services
+"""
+
+
+@pytest.fixture
+def services(tmp_path, monkeypatch):
+    (tmp_path / "manifested.py").write_text(textwrap.dedent(SERVICES))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path / "manifested.py"
+    sys.modules.pop("manifested", None)
+    use_manifest(None)
+
+
+def load_services():
+    sys.modules.pop("manifested", None)
+    importlib.invalidate_caches()
+    return importlib.import_module("manifested")
+
+
+def test_type_references():
+    assert decode_type(encode_type(All)) is All
+    assert decode_type(encode_type(All[int])) == All[int]
+
+    class Local:
+        pass
+
+    assert encode_type(Local) is None
+    assert encode_type(int | None) is None
+
+
+def test_manifest_written(initialize, services, tmp_path):
+    path = tmp_path / "manifest.json"
+    use_manifest(str(path))
+    load_services()
+    save_manifest()
+
+    entries = json.loads(path.read_text())["manifested"]
+    assert entries["providers"]["settings"]["types"] == {"return": "manifested:Settings"}
+    assert entries["providers"]["Service"]["types"] == {"settings": "manifested:Settings",
+                                                        "return": "manifested:Service"}
+    assert entries["injections"]["handler"]["fields"] == {"positional": ["service", "services", "value"],
+                                                          "defaults": ["value"]}
+
+
+def test_manifest_skips_introspection(initialize, services, tmp_path, monkeypatch):
+    path = tmp_path / "manifest.json"
+    use_manifest(str(path))
+    load_services()
+    save_manifest()
+
+    def introspect(fn):
+        raise AssertionError(f"{fn} was introspected.")
+
+    initialize_container()
+    monkeypatch.setattr(importlib.import_module("sproing.dependency"), "get_hints", introspect)
+    monkeypatch.setattr(injection, "get_type_hints", introspect)
+    current = use_manifest(str(path))
+    module = load_services()
+
+    service, services = module.handler()
+    assert isinstance(service.settings, module.Settings)
+    assert len(services) == 1
+    assert (current.hits, current.misses) == (3, 0)
+
+
+def test_manifest_rebuilds_stale_module(initialize, services, tmp_path):
+    path = tmp_path / "manifest.json"
+    use_manifest(str(path))
+    load_services()
+    save_manifest()
+
+    services.write_text(textwrap.dedent(SERVICES).replace("def settings()", "def get_settings()")
+                        .replace("dependency(settings,", "dependency(get_settings,"))
+    initialize_container()
+    current = use_manifest(str(path))
+    load_services()
+    save_manifest()
+
+    assert (current.hits, current.misses) == (0, 3)
+    providers = json.loads(path.read_text())["manifested"]["providers"]
+    assert set(providers) == {"get_settings", "Service"}
+
+
+def test_manifest_shared_with_scan(initialize, services, tmp_path):
+    path = tmp_path / "manifest.json"
+    for _ in range(3):
+        initialize_container()
+        scan("manifested", manifest=str(path))
+        current = use_manifest(str(path))
+        load_services()
+        save_manifest()
+
+    assert (current.hits, current.misses) == (3, 0)
+    sections = json.loads(path.read_text())
+    assert sections["__scan__"]["manifested"]["index"]["types"] == ["Service", "Settings"]
+    assert set(sections["manifested"]["providers"]) == {"settings", "Service"}
+
+
+def test_manifest_disabled_by_default():
+    assert manifest.current_manifest is None
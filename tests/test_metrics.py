@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from sproing import dependency, inject
+from sproing.metrics import enable_metrics, disable_metrics, SproingHistogram
+
+
+@pytest.fixture
+def sink(initialize):
+    sink = enable_metrics()
+    yield sink
+    disable_metrics()
+
+
+def test_provider_calls_and_builds(sink):
+    def factory() -> str:
+        return "factory"
+
+    sproing_dependency = dependency(factory)
+
+    def singleton() -> int:
+        return 1
+
+    singleton_dependency = dependency(singleton, singleton=True)
+
+    for _ in range(3):
+        sproing_dependency()
+        singleton_dependency()
+
+    providers = sink.snapshot()["providers"]
+    assert providers["factory"]["calls"] == 3
+    assert providers["factory"]["builds"]["count"] == 3
+    assert providers["singleton"]["calls"] == 3
+    assert providers["singleton"]["builds"]["count"] == 1
+
+
+def test_metrics_installed_on_registered_dependencies(initialize):
+    def factory() -> str:
+        return "factory"
+
+    sproing_dependency = dependency(factory)
+
+    sink = enable_metrics()
+    try:
+        sproing_dependency()
+    finally:
+        disable_metrics()
+    sproing_dependency()
+
+    assert sink.snapshot()["providers"]["factory"]["calls"] == 1
+
+
+def test_injection_metrics(sink):
+    def factory() -> str:
+        return "factory"
+
+    dependency(factory)
+
+    @inject()
+    def handler(value: str) -> str:
+        return value
+
+    @inject(compile=True)
+    def compiled_handler(value: str) -> str:
+        return value
+
+    handler()
+    handler()
+    compiled_handler()
+
+    snapshot = sink.snapshot()
+    assert snapshot["injections"]["handler"]["count"] == 2
+    assert snapshot["injections"]["compiled_handler"]["count"] == 1
+    assert snapshot["providers"]["factory"]["calls"] == 3
+
+
+def test_async_injection_metrics(sink):
+    async def factory() -> str:
+        return "factory"
+
+    dependency(factory, singleton=True)
+
+    @inject()
+    async def handler(value: str) -> str:
+        return value
+
+    asyncio.run(handler())
+    asyncio.run(handler())
+
+    snapshot = sink.snapshot()
+    assert snapshot["injections"]["handler"]["count"] == 2
+    assert snapshot["providers"]["factory"]["calls"] == 2
+    assert snapshot["providers"]["factory"]["builds"]["count"] == 1
+
+
+def test_custom_sink(initialize):
+    class Sink:
+        def __init__(self):
+            self.events = []
+
+        def record_call(self, dependency_name):
+            self.events.append(("call", dependency_name))
+
+        def record_build(self, dependency_name, seconds):
+            self.events.append(("build", dependency_name))
+
+        def record_injection(self, injected_name, seconds):
+            self.events.append(("injection", injected_name))
+
+    def factory() -> str:
+        return "factory"
+
+    dependency(factory)
+
+    @inject()
+    def handler(value: str) -> str:
+        return value
+
+    sink = enable_metrics(Sink())
+    try:
+        handler()
+    finally:
+        disable_metrics()
+
+    assert sink.events == [("call", "factory"), ("build", "factory"), ("injection", "handler")]
+
+
+def test_disabled_metrics_restore_strategies(initialize):
+    def factory() -> str:
+        return "factory"
+
+    sproing_dependency = dependency(factory)
+
+    enable_metrics()
+    disable_metrics()
+
+    assert sproing_dependency.strategy == factory
+
+
+def test_histogram_percentiles():
+    histogram = SproingHistogram()
+    for _ in range(90):
+        histogram.record(1e-6)
+    for _ in range(10):
+        histogram.record(1e-3)
+
+    assert histogram.percentile(0.5) == 1e-6
+    assert 1e-3 <= histogram.percentile(0.99) < 2e-3
@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from sproing import dependency, inject
+from sproing.container import All, warm_up
+from sproing.pool import pooled, SproingPoolDefinitionError, SproingPooledDependencyError, SproingPoolTimeoutError
+
+
+class Parser:
+    def __init__(self):
+        self.buffer = []
+
+
+def test_pooled_dependency_reused(initialize):
+    built = 0
+
+    def parser() -> Parser:
+        nonlocal built
+        built += 1
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=2))
+
+    @inject()
+    def handler(parser: Parser) -> Parser:
+        return parser
+
+    assert handler() is handler()
+    assert built == 1
+
+    stats = sproing_dependency.pool.stats()
+    assert (stats.hits, stats.misses, stats.size, stats.idle) == (1, 1, 1, 1)
+
+
+def test_pooled_dependency_reset_on_release(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    dependency(parser, pool=pooled(max_size=1, reset=lambda instance: instance.buffer.clear()))
+
+    @inject()
+    def handler(parser: Parser) -> int:
+        parser.buffer.append("data")
+        return len(parser.buffer)
+
+    assert handler() == 1
+    assert handler() == 1
+
+
+def test_pooled_dependency_released_on_error(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1))
+
+    @inject()
+    def handler(parser: Parser) -> None:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        handler()
+
+    assert sproing_dependency.pool.stats().idle == 1
+
+
+def test_pooled_dependency_bounded(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=2))
+    in_use = 0
+    peak = 0
+    lock = threading.Lock()
+
+    @inject()
+    def handler(parser: Parser) -> None:
+        nonlocal in_use, peak
+        with lock:
+            in_use += 1
+            peak = max(peak, in_use)
+        time.sleep(0.01)
+        with lock:
+            in_use -= 1
+
+    threads = [threading.Thread(target=handler) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = sproing_dependency.pool.stats()
+    assert peak <= 2
+    assert stats.size == 2
+    assert stats.waits > 0
+    assert stats.wait_time > 0
+
+
+def test_pooled_dependency_timeout(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1, timeout=0.01))
+
+    sproing_dependency()
+    with pytest.raises(SproingPoolTimeoutError):
+        sproing_dependency()
+
+
+def test_pooled_dependency_async_acquire(initialize):
+    async def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1))
+
+    @inject()
+    async def handler(parser: Parser) -> Parser:
+        await asyncio.sleep(0.01)
+        return parser
+
+    async def run():
+        return await asyncio.gather(*(handler() for _ in range(3)))
+
+    first, second, third = asyncio.run(run())
+    assert first is second is third
+    assert sproing_dependency.pool.stats().waits == 2
+
+
+def test_pooled_dependency_async_acquire_cancelled(initialize):
+    async def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1))
+    release = asyncio.Event()
+
+    @inject()
+    async def holder(parser: Parser) -> Parser:
+        await release.wait()
+        return parser
+
+    @inject()
+    async def user(parser: Parser) -> Parser:
+        return parser
+
+    async def run():
+        holding = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(user())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        release.set()
+        held = await holding
+        return held, await asyncio.wait_for(user(), 1)
+
+    held, used = asyncio.run(run())
+    assert held is used
+    stats = sproing_dependency.pool.stats()
+    assert (stats.size, stats.idle) == (1, 1)
+    assert not sproing_dependency.pool.waiters
+
+
+def test_pooled_dependency_async_timeout(initialize):
+    async def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1, timeout=0.01))
+
+    async def run():
+        instance = await sproing_dependency()
+        with pytest.raises(SproingPoolTimeoutError):
+            await sproing_dependency()
+        sproing_dependency.release(instance)
+        return await sproing_dependency()
+
+    assert isinstance(asyncio.run(run()), Parser)
+    assert not sproing_dependency.pool.waiters
+
+
+def test_pooled_dependency_async_waiter_woken_by_thread(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1))
+    instance = sproing_dependency()
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.01, threading.Thread(target=sproing_dependency.release,
+                                                                     args=(instance,)).start)
+        return await asyncio.wait_for(sproing_dependency.pool.acquire_async(), 1)
+
+    assert asyncio.run(run()) is instance
+
+
+def test_compiled_pooled_dependency(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=1))
+
+    def name() -> str:
+        return "parser"
+
+    dependency(name)
+
+    @inject(compile=True)
+    def handler(parser: Parser, name: str) -> Parser:
+        return parser
+
+    assert handler() is handler()
+    assert sproing_dependency.pool.stats().idle == 1
+
+
+def test_pool_filled_on_warm_up(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    sproing_dependency = dependency(parser, pool=pooled(max_size=4, min_idle=2))
+
+    warm_up()
+
+    assert sproing_dependency.pool.stats().idle == 2
+
+
+def test_pooled_singleton(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    with pytest.raises(SproingPoolDefinitionError):
+        dependency(parser, singleton=True, pool=pooled(max_size=1))
+
+
+def test_pooled_dependency_in_all(initialize):
+    def parser() -> Parser:
+        return Parser()
+
+    dependency(parser, pool=pooled(max_size=1))
+
+    def another_parser() -> Parser:
+        return Parser()
+
+    dependency(another_parser)
+
+    @inject()
+    def handler(parsers: All[Parser]) -> None:
+        ...
+
+    with pytest.raises(SproingPooledDependencyError):
+        handler()
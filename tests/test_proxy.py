@@ -0,0 +1,136 @@
+import pytest
+
+from sproing import dependency, inject
+from sproing.injection import SproingInjectionDefinitionError
+from sproing.proxy import SproingLazyProxy
+
+
+class Client:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, path: str) -> str:
+        self.calls.append(path)
+        return path
+
+
+def test_proxy_builds_on_first_use():
+    built = 0
+
+    def resolve() -> Client:
+        nonlocal built
+        built += 1
+        return Client()
+
+    proxy = SproingLazyProxy(resolve)
+    assert built == 0
+
+    assert proxy.get("/") == "/"
+    assert proxy.calls == ["/"]
+    assert built == 1
+    assert isinstance(proxy, Client)
+
+
+def test_proxy_forwards_protocols():
+    proxy = SproingLazyProxy(lambda: [1, 2])
+
+    assert len(proxy) == 2
+    assert list(proxy) == [1, 2]
+    assert 2 in proxy
+    assert proxy[0] == 1
+    assert proxy == [1, 2]
+
+
+def test_lazy_injection(initialize):
+    built = 0
+
+    def client() -> Client:
+        nonlocal built
+        built += 1
+        return Client()
+
+    dependency(client)
+
+    def name() -> str:
+        return "handler"
+
+    dependency(name)
+
+    @inject(lazy=True)
+    def handler(client: Client, name: str) -> str:
+        return name
+
+    assert handler() == "handler"
+    assert built == 0
+
+
+def test_lazy_injection_of_named_arguments(initialize):
+    built = []
+
+    def client() -> Client:
+        built.append("client")
+        return Client()
+
+    dependency(client)
+
+    def name() -> str:
+        built.append("name")
+        return "/"
+
+    dependency(name)
+
+    @inject(lazy={"client"})
+    def handler(client: Client, name: str) -> Client:
+        return client
+
+    client_proxy = handler()
+    assert built == ["name"]
+    assert client_proxy.get("/") == "/"
+    assert built == ["name", "client"]
+
+
+def test_compiled_lazy_injection(initialize):
+    built = 0
+
+    def client() -> Client:
+        nonlocal built
+        built += 1
+        return Client()
+
+    dependency(client)
+
+    @inject(lazy=True, compile=True)
+    def handler(client: Client) -> Client:
+        return client
+
+    proxy = handler()
+    assert built == 0
+    assert proxy.get("/") == "/"
+    assert built == 1
+
+
+def test_lazy_injection_of_initialized_singleton(initialize):
+    def client() -> Client:
+        return Client()
+
+    sproing_dependency = dependency(client, singleton=True)
+
+    @inject(lazy=True)
+    def handler(client: Client) -> Client:
+        return client
+
+    assert type(handler()) is SproingLazyProxy
+    instance = sproing_dependency()
+    assert handler() is instance
+
+
+def test_lazy_injection_of_unknown_argument(initialize):
+    def client() -> Client:
+        return Client()
+
+    dependency(client)
+
+    with pytest.raises(SproingInjectionDefinitionError):
+        @inject(lazy={"other"})
+        def handler(client: Client) -> Client:
+            return client
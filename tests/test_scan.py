@@ -0,0 +1,228 @@
+import json
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from sproing import container, dependency, inject
+from sproing.container import All, NoSuchSproingDependency
+from sproing.scan import scan, SproingScanError
+
+MODELS = """
+class Client:
+    pass
+
+
+class HttpClient(Client):
+    pass
+"""
+
+CLIENTS = """
+from sproing import dependency
+from scanned.models import Client, HttpClient
+
+
+def client() -> Client:
+    return Client()
+
+
+def http_client() -> "HttpClient":
+    return HttpClient()
+
+
+dependency(client, primary=True)
+dependency(http_client, name="http")
+"""
+
+SETTINGS = """
+from sproing import dependency
+
+
+class Settings:
+    pass
+
+
+dependency(Settings, singleton=True)
+"""
+
+SLOW = """
+import time
+
+from sproing import dependency
+from scanned.timing import Timer
+
+time.sleep(0.2)
+
+
+def timer() -> Timer:
+    return Timer()
+
+
+dependency(timer)
+"""
+
+DECORATED = """
+import sproing
+from sproing import dependency
+from scanned.timing import Timer
+
+
+@dependency
+def timer() -> "Timer":
+    return Timer()
+
+
+@sproing.dependency
+class Clock:
+    def __init__(self, timer: Timer):
+        self.timer = timer
+"""
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "scanned"
+    providers = root / "providers"
+    providers.mkdir(parents=True)
+    (root / "__init__.py").write_text("")
+    (root / "models.py").write_text(textwrap.dedent(MODELS))
+    (providers / "__init__.py").write_text("")
+    (providers / "clients.py").write_text(textwrap.dedent(CLIENTS))
+    (providers / "settings.py").write_text(textwrap.dedent(SETTINGS))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield providers
+    for module in [module for module in sys.modules if module.split(".")[0] == "scanned"]:
+        del sys.modules[module]
+
+
+def test_scan_does_not_import(initialize, package):
+    index = scan("scanned.providers")
+
+    assert "scanned.providers.clients" not in sys.modules
+    assert "scanned.providers.settings" not in sys.modules
+    assert index.types == {"Client": {"scanned.providers.clients"},
+                           "HttpClient": {"scanned.providers.clients"},
+                           "Settings": {"scanned.providers.settings"}}
+    assert index.names == {"http": {"scanned.providers.clients"}}
+
+
+def test_scanned_module_imported_on_first_lookup(initialize, package):
+    scan("scanned.providers")
+    from scanned.models import Client
+
+    assert container.get_dependency(Client)[0]().__class__ is Client
+    assert "scanned.providers.clients" in sys.modules
+    assert "scanned.providers.settings" not in sys.modules
+
+
+def test_scanned_primary_preferred_over_registered(initialize, package):
+    from scanned.models import Client
+
+    class LocalClient(Client):
+        pass
+
+    def fallback() -> Client:
+        return Client()
+
+    def local_client() -> LocalClient:
+        return LocalClient()
+
+    dependency(fallback)
+    dependency(local_client)
+    scan("scanned.providers")
+
+    assert container.get_dependency(Client)[0].name == "client"
+    assert "scanned.providers.clients" in sys.modules
+
+
+def test_concurrent_first_lookups_wait_for_import(initialize, package):
+    (package.parent / "timing.py").write_text("class Timer:\n    pass\n")
+    (package / "slow.py").write_text(textwrap.dedent(SLOW))
+    scan("scanned.providers")
+    from scanned.timing import Timer
+
+    barrier = threading.Barrier(2)
+    results = []
+
+    def lookup():
+        barrier.wait()
+        try:
+            results.append(container.get_dependency(Timer)[0].name)
+        except NoSuchSproingDependency as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=lookup) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["timer", "timer"]
+
+
+def test_scan_indexes_decorated_providers(initialize, package):
+    (package.parent / "timing.py").write_text("class Timer:\n    pass\n")
+    (package / "decorated.py").write_text(textwrap.dedent(DECORATED))
+    index = scan("scanned.providers")
+    from scanned.timing import Timer
+
+    assert index.types["Timer"] == index.types["Clock"] == {"scanned.providers.decorated"}
+    assert "scanned.providers.decorated" not in sys.modules
+    assert container.get_dependency(Timer)[0].name == "timer"
+    assert "scanned.providers.decorated" in sys.modules
+
+
+def test_scanned_module_imported_on_named_lookup(initialize, package):
+    scan("scanned.providers")
+
+    assert container.get_named_dependency("http")().__class__.__name__ == "HttpClient"
+    assert "scanned.providers.settings" not in sys.modules
+
+
+def test_scanned_module_imported_for_all(initialize, package):
+    scan("scanned.providers")
+    from scanned.models import Client
+
+    @inject()
+    def handler(clients: All[Client]):
+        return clients
+
+    assert {client.__class__.__name__ for client in handler()} == {"Client", "HttpClient"}
+
+
+def test_scanned_module_imported_on_seal(initialize, package):
+    scan("scanned.providers")
+    container.seal()
+
+    assert "scanned.providers.settings" in sys.modules
+
+
+def test_scan_miss_still_raises(initialize, package):
+    scan("scanned.providers")
+
+    class Unknown:
+        pass
+
+    with pytest.raises(NoSuchSproingDependency):
+        container.get_dependency(Unknown)
+
+
+def test_scan_reuses_manifest(initialize, package, tmp_path):
+    manifest = tmp_path / "manifest.json"
+    scan("scanned.providers", manifest=str(manifest))
+    entries = json.loads(manifest.read_text())
+    entries["__scan__"]["scanned.providers.settings"]["index"]["names"] = ["cached"]
+    manifest.write_text(json.dumps(entries))
+
+    index = scan("scanned.providers", manifest=str(manifest))
+    assert index.names["cached"] == {"scanned.providers.settings"}
+
+    (package / "settings.py").write_text(textwrap.dedent(SETTINGS) + "\n")
+    index = scan("scanned.providers", manifest=str(manifest))
+    assert "cached" not in index.names
+
+
+def test_scan_unknown_package(initialize):
+    with pytest.raises(SproingScanError):
+        scan("scanned_missing")
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+
+import pytest
+
+from sproing import container
+from sproing import dependency, inject
+from sproing.container import Container
+from sproing.dependency import SproingScopeDefinitionError
+from sproing.scope import SproingScopeError
+
+
+class UnitOfWork:
+    pass
+
+
+def test_scoped_dependency_cached_per_scope(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    sproing_dependency = dependency(unit_of_work, scope="request")
+
+    with container.scope():
+        first = sproing_dependency()
+        assert sproing_dependency() is first
+
+    with container.scope():
+        assert sproing_dependency() is not first
+
+
+def test_scope_on_container_instance(initialize):
+    parent = Container()
+    child = parent.child()
+
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    dependency(unit_of_work, scope="request", container=parent)
+
+    @inject(container=child)
+    def handler(unit_of_work: UnitOfWork) -> UnitOfWork:
+        return unit_of_work
+
+    with child.scope():
+        first = handler()
+        assert handler() is first
+
+    with parent.scope():
+        assert handler() is not first
+
+
+def test_scope_released_on_exit(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    sproing_dependency = dependency(unit_of_work, scope="request")
+
+    with container.scope() as request_scope:
+        sproing_dependency()
+        assert len(request_scope.instances) == 1
+
+    assert not request_scope.instances
+
+
+def test_scoped_dependency_without_scope(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    sproing_dependency = dependency(unit_of_work, scope="request")
+
+    with pytest.raises(SproingScopeError):
+        sproing_dependency()
+
+
+def test_scoped_dependency_injected(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    dependency(unit_of_work, scope="request")
+
+    @inject()
+    def handler(work: UnitOfWork) -> UnitOfWork:
+        return work
+
+    with container.scope():
+        assert handler() is handler()
+
+
+def test_scopes_isolated_between_threads(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    sproing_dependency = dependency(unit_of_work, scope="request")
+    instances = []
+
+    def request():
+        with container.scope():
+            instances.append(sproing_dependency())
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(instance) for instance in instances}) == 4
+
+
+def test_async_scopes_isolated_between_tasks(initialize):
+    async def unit_of_work() -> UnitOfWork:
+        await asyncio.sleep(0)
+        return UnitOfWork()
+
+    dependency(unit_of_work, scope="request")
+
+    @inject()
+    async def handler(work: UnitOfWork) -> UnitOfWork:
+        return work
+
+    async def request():
+        async with container.scope():
+            first = await handler()
+            assert await handler() is first
+            return first
+
+    async def run():
+        return await asyncio.gather(*(request() for _ in range(4)))
+
+    assert len({id(instance) for instance in asyncio.run(run())}) == 4
+
+
+def test_scoped_singleton(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    with pytest.raises(SproingScopeDefinitionError):
+        dependency(unit_of_work, singleton=True, scope="request")
+
+
+def test_long_lived_dependency_cannot_depend_on_scoped(initialize):
+    class Service:
+        def __init__(self, unit_of_work: UnitOfWork):
+            self.unit_of_work = unit_of_work
+
+    class Handler:
+        def __init__(self, service: Service):
+            self.service = service
+
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    dependency(unit_of_work, scope="request")
+    dependency(Service)
+    handler_dependency = dependency(Handler, singleton=True)
+
+    with container.scope():
+        with pytest.raises(SproingScopeDefinitionError):
+            handler_dependency()
+        assert container.get_dependency(Service)[0]().unit_of_work is not None
+
+
+def test_unknown_scope(initialize):
+    def unit_of_work() -> UnitOfWork:
+        return UnitOfWork()
+
+    with pytest.raises(SproingScopeDefinitionError):
+        dependency(unit_of_work, scope="session")
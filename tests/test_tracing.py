@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from sproing import dependency, inject
+from sproing.container import warm_up
+from sproing.tracing import start_tracing, stop_tracing
+
+
+class Settings:
+    pass
+
+
+class Pool:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+
+class Repository:
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+
+@pytest.fixture
+def trace(initialize):
+    def settings() -> Settings:
+        return Settings()
+
+    dependency(settings)
+
+    def pool(settings: Settings) -> Pool:
+        return Pool(settings)
+
+    dependency(pool, singleton=True, lazy=False)
+
+    def repository(pool: Pool) -> Repository:
+        return Repository(pool)
+
+    dependency(repository)
+
+    trace = start_tracing()
+    yield trace
+    stop_tracing()
+
+
+def test_trace_records_construction_tree(trace):
+    @inject()
+    def handler(repository: Repository) -> Repository:
+        return repository
+
+    handler()
+
+    names = [event.name for event in trace.events]
+    assert names == ["repository", "pool", "settings"]
+    assert [event.parent for event in trace.events] == [None, 0, 1]
+    assert all(event.end >= event.start for event in trace.events)
+
+
+def test_trace_warm_up_threads(trace):
+    warm_up()
+
+    assert [event.name for event in trace.events] == ["pool", "settings"]
+    assert trace.events[1].parent == 0
+
+
+def test_chrome_trace_export(trace):
+    @inject()
+    def handler(repository: Repository) -> Repository:
+        return repository
+
+    handler()
+
+    chrome_trace = json.loads(json.dumps(trace.to_chrome_trace()))
+    events = chrome_trace["traceEvents"]
+    assert [event["name"] for event in events] == ["repository", "pool", "settings"]
+    assert all(event["ph"] == "X" for event in events)
+    assert events[2]["args"]["stack"] == "repository;pool;settings"
+
+
+def test_collapsed_stacks_export(trace):
+    @inject()
+    def handler(repository: Repository) -> Repository:
+        return repository
+
+    handler()
+    handler()
+
+    stacks = [line.rsplit(" ", 1)[0] for line in trace.to_collapsed_stacks().splitlines()]
+    assert stacks == ["repository", "repository;pool", "repository;pool;settings"]
+
+
+def test_trace_async_construction(initialize):
+    async def settings() -> Settings:
+        return Settings()
+
+    dependency(settings)
+
+    async def pool(settings: Settings) -> Pool:
+        return Pool(settings)
+
+    dependency(pool)
+
+    trace = start_tracing()
+    try:
+        @inject()
+        async def handler(pool: Pool) -> Pool:
+            return pool
+
+        asyncio.run(handler())
+    finally:
+        stop_tracing()
+
+    assert [(event.name, event.parent) for event in trace.events] == [("pool", None), ("settings", 0)]
+
+
+def test_stop_tracing(trace):
+    stop_tracing()
+
+    @inject()
+    def handler(repository: Repository) -> Repository:
+        return repository
+
+    handler()
+
+    assert trace.events == []